@@ -0,0 +1,68 @@
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+# Decisão de acesso: TTL curto como rede de segurança caso uma invalidação se perca.
+USER_COMPANY_IDS_TIMEOUT = 60
+
+
+def _user_company_ids_version_key(user_id):
+    return f"user_company_ids_version:{user_id}"
+
+
+def _user_company_ids_key(user_id, version):
+    return f"user_company_ids:{user_id}:{version}"
+
+
+def _current_version(user_id):
+    """
+    Versão atual do cache de empresas do usuário. Cada invalidação grava um
+    token novo, então um conjunto lido antes da invalidação fica órfão na
+    versão antiga em vez de sobrescrever o valor invalidado.
+    """
+    version_key = _user_company_ids_version_key(user_id)
+    version = cache.get(version_key)
+    if version is None:
+        cache.add(version_key, uuid.uuid4().hex, None)
+        version = cache.get(version_key)
+    return version
+
+
+def get_user_company_ids(user_id) -> set:
+    """
+    Ids das empresas às quais o usuário pertence, cacheados até a próxima
+    alteração de Membership desse usuário. Se o cache estiver indisponível,
+    consulta o banco diretamente.
+    """
+    from .models import Membership
+
+    try:
+        key = _user_company_ids_key(user_id, _current_version(user_id))
+        company_ids = cache.get(key)
+    except Exception:
+        key = company_ids = None
+    if company_ids is not None:
+        return company_ids
+
+    company_ids = set(
+        Membership.objects.filter(user_id=user_id).values_list("company_id", flat=True)
+    )
+    if key is not None:
+        try:
+            cache.set(key, company_ids, USER_COMPANY_IDS_TIMEOUT)
+        except Exception:
+            pass
+    return company_ids
+
+
+def invalidate_user_company_ids(user_id):
+    version_key = _user_company_ids_version_key(user_id)
+
+    def bump_version():
+        try:
+            cache.set(version_key, uuid.uuid4().hex, None)
+        except Exception:
+            pass
+
+    transaction.on_commit(bump_version)
@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_user_company_ids
+from .models import Membership
+
+
+@receiver(post_save, sender=Membership)
+def membership_cache_post_save(sender, instance: Membership, **kwargs):
+    invalidate_user_company_ids(instance.user_id)
+
+
+@receiver(post_delete, sender=Membership)
+def membership_cache_post_delete(sender, instance: Membership, **kwargs):
+    invalidate_user_company_ids(instance.user_id)
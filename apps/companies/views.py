@@ -1,7 +1,7 @@
 from decimal import Decimal
 
 from django.db import transaction
-from django.db.models import Sum
+from django.db.models import Exists, OuterRef, Sum
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from rest_framework import permissions, status, viewsets
@@ -53,8 +53,9 @@ def _is_company_admin(user, company):
     """
     if user.is_superuser or user.is_staff:
         return True
-    membership = Membership.objects.filter(company=company, user=user).first()
-    return membership and membership.role == Membership.Roles.ADMIN
+    return Membership.objects.filter(
+        company=company, user=user, role=Membership.Roles.ADMIN
+    ).exists()
 
 
 def _flatten_errors(detail):
@@ -86,7 +87,9 @@ class CompanyViewSet(viewsets.ModelViewSet):
         user = self.request.user
         if not user.is_authenticated:
             return Company.objects.none()
-        return Company.objects.filter(memberships__user=user).distinct()
+        return Company.objects.filter(
+            Exists(Membership.objects.filter(company_id=OuterRef("pk"), user=user))
+        )
 
     def perform_create(self, serializer):
         if not self.request.user.is_authenticated:
@@ -2,6 +2,7 @@ from django.conf import settings
 from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework_simplejwt.exceptions import InvalidToken
 
+from apps.companies.cache import get_user_company_ids
 from apps.companies.models import Company, Membership
 from apps.users.authentication import CompanyAccessToken
 
@@ -39,7 +40,11 @@ class ActiveCompanyMixin:
         if not company_id:
             # Fallback: pick the first membership as a default.
             if self.request.user and self.request.user.is_authenticated:
-                membership = Membership.objects.filter(user=self.request.user).first()
+                membership = (
+                    Membership.objects.filter(user=self.request.user)
+                    .select_related("company")
+                    .first()
+                )
                 if membership:
                     self.request._cached_active_company = membership.company
                     return membership.company
@@ -61,9 +66,18 @@ class ActiveCompanyMixin:
         user = self.request.user
         if not user or not user.is_authenticated:
             raise PermissionDenied("Authentication required.")
-        if not Membership.objects.filter(company=company, user=user).exists():
+        if company.pk not in self._user_company_ids():
             raise PermissionDenied("You do not belong to this company.")
 
+    def _user_company_ids(self) -> set:
+        """
+        Company ids the current user belongs to, read once per request from the
+        membership cache (invalidated whenever the user's memberships change).
+        """
+        if not hasattr(self.request, "_user_company_ids"):
+            self.request._user_company_ids = get_user_company_ids(self.request.user.pk)
+        return self.request._user_company_ids
+
     def _get_company_from_token(self):
         raw_token = (
             self.request.headers.get("X-Company-Token")
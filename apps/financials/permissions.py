@@ -9,6 +9,9 @@ class IsCompanyMember(permissions.BasePermission):
     def has_permission(self, request, view):
         if not request.user or not request.user.is_authenticated:
             return False
+        if getattr(request, "_is_company_member", False):
+            return True
         # get_active_company raises ValidationError or PermissionDenied with useful messages.
         view.get_active_company()
+        request._is_company_member = True
         return True
@@ -38,6 +38,7 @@ class StockItemAdmin(admin.ModelAdmin):
     list_filter = ('company', 'inventory', 'created_at')
     search_fields = ('product__name', 'inventory__name', 'company__name')
     readonly_fields = ('created_at', 'updated_at')
+    ordering = ('company__name', 'product__name', 'inventory__name')
 
 
 @admin.register(InventoryMovement)
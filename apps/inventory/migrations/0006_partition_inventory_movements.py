@@ -0,0 +1,118 @@
+from datetime import date
+
+from django.db import migrations
+
+# Converte inventory_movements em tabela particionada por mês (RANGE em created_at).
+# O estado do Django não muda: o ORM continua enxergando uma tabela comum.
+#
+# Atenção: a cópia (INSERT ... SELECT *) roda dentro da transação da migração e
+# mantém ACCESS EXCLUSIVE em inventory_movements do RENAME até o COMMIT. Leituras
+# e escritas de movimentações ficam bloqueadas durante toda a cópia: aplicar (e
+# reverter) em janela de manutenção, com duração proporcional ao tamanho da tabela.
+
+MONTHS_AHEAD = 3
+
+
+def _add_months(day, months):
+    month_index = day.month - 1 + months
+    return date(day.year + month_index // 12, month_index % 12 + 1, 1)
+
+
+def _constraints_and_indexes(qn, primary_key):
+    return [
+        f"ALTER TABLE inventory_movements ADD PRIMARY KEY ({primary_key})",
+        "ALTER TABLE inventory_movements ADD CONSTRAINT inventory_movements_stock_item_id_fk "
+        "FOREIGN KEY (stock_item_id) REFERENCES stock_item (id) DEFERRABLE INITIALLY DEFERRED",
+        "ALTER TABLE inventory_movements ADD CONSTRAINT inventory_movements_company_id_fk "
+        "FOREIGN KEY (company_id) REFERENCES company (id) DEFERRABLE INITIALLY DEFERRED",
+        "ALTER TABLE inventory_movements ADD CONSTRAINT inventory_movements_user_id_fk "
+        f"FOREIGN KEY (user_id) REFERENCES {qn('user')} (id) DEFERRABLE INITIALLY DEFERRED",
+        "ALTER TABLE inventory_movements ADD CONSTRAINT inventory_movements_related_inventory_id_fk "
+        "FOREIGN KEY (related_inventory_id) REFERENCES inventory (id) DEFERRABLE INITIALLY DEFERRED",
+        "CREATE INDEX inventory_movements_stock_item_id_idx ON inventory_movements (stock_item_id)",
+        "CREATE INDEX inventory_movements_company_id_idx ON inventory_movements (company_id)",
+        "CREATE INDEX inventory_movements_user_id_idx ON inventory_movements (user_id)",
+        "CREATE INDEX inventory_movements_related_inventory_id_idx "
+        "ON inventory_movements (related_inventory_id)",
+        "CREATE INDEX inventory_movements_created_at_brin "
+        "ON inventory_movements USING BRIN (created_at)",
+    ]
+
+
+def partition_inventory_movements(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    qn = schema_editor.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT MIN(created_at) FROM inventory_movements")
+        oldest = cursor.fetchone()[0]
+
+    today = date.today()
+    first_month = date(oldest.year, oldest.month, 1) if oldest else date(today.year, today.month, 1)
+    last_month = _add_months(date(today.year, today.month, 1), MONTHS_AHEAD)
+
+    statements = [
+        "ALTER TABLE inventory_movements RENAME TO inventory_movements_legacy",
+        "CREATE TABLE inventory_movements "
+        "(LIKE inventory_movements_legacy INCLUDING DEFAULTS INCLUDING STORAGE) "
+        "PARTITION BY RANGE (created_at)",
+        "CREATE TABLE inventory_movements_default PARTITION OF inventory_movements DEFAULT",
+    ]
+
+    month = first_month
+    while month <= last_month:
+        next_month = _add_months(month, 1)
+        statements.append(
+            f"CREATE TABLE inventory_movements_y{month.year}m{month.month:02d} "
+            f"PARTITION OF inventory_movements "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') "
+            f"TO ('{next_month.isoformat()} 00:00:00+00')"
+        )
+        month = next_month
+
+    statements += [
+        "INSERT INTO inventory_movements SELECT * FROM inventory_movements_legacy",
+        "DROP TABLE inventory_movements_legacy",
+    ]
+    # A chave primária de uma tabela particionada precisa incluir a coluna de partição.
+    statements += _constraints_and_indexes(qn, "id, created_at")
+
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def unpartition_inventory_movements(apps, schema_editor):
+    """
+    Volta para uma tabela comum com PRIMARY KEY (id). Se a tabela particionada
+    tiver ids repetidos (só (id, created_at) era único), o ADD PRIMARY KEY falha
+    e a reversão inteira é desfeita.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    statements = [
+        "ALTER TABLE inventory_movements RENAME TO inventory_movements_partitioned",
+        "CREATE TABLE inventory_movements "
+        "(LIKE inventory_movements_partitioned INCLUDING DEFAULTS INCLUDING STORAGE)",
+        "INSERT INTO inventory_movements SELECT * FROM inventory_movements_partitioned",
+        # Remove também todas as partições (inclusive as criadas por ensure_monthly_partitions)
+        "DROP TABLE inventory_movements_partitioned",
+    ]
+    statements += _constraints_and_indexes(schema_editor.quote_name, "id")
+
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0005_inventorymovement_user"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            partition_inventory_movements, reverse_code=unpartition_inventory_movements
+        ),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0006_partition_inventory_movements"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="stockitem",
+            options={},
+        ),
+    ]
@@ -2,6 +2,7 @@ import uuid
 
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from apps.companies.models import Company, TimeStampedModel
 
 
@@ -90,11 +91,21 @@ class StockItem(TimeStampedModel):
     class Meta:
         db_table = "stock_item"
         unique_together = ("company", "product", "inventory")
-        ordering = ["company", "product", "inventory"]
 
     def __str__(self):
         return f"{self.product.name} - {self.inventory.name} ({self.quantity_on_hand})"
 
+    def apply_quantity_delta(self, delta):
+        """
+        Soma ``delta`` a quantity_on_hand com um único UPDATE atômico (F()),
+        sem ler-modificar-gravar em Python, e recarrega o valor resultante.
+        """
+        StockItem.objects.filter(pk=self.pk).update(
+            quantity_on_hand=models.F("quantity_on_hand") + delta,
+            updated_at=timezone.now(),
+        )
+        self.refresh_from_db(fields=["quantity_on_hand"])
+
 
 class InventoryMovement(TimeStampedModel):
     """O Histórico (Kardex)"""
@@ -142,6 +153,9 @@ class InventoryMovement(TimeStampedModel):
     )
 
     class Meta:
+        # Tabela particionada por mês em created_at (ver migração 0006 e
+        # apps.inventory.partitions); a task inventory.create_movement_partitions
+        # cria as partições futuras.
         db_table = "inventory_movements"
         ordering = ["-created_at"]
 
@@ -168,38 +182,49 @@ class InventoryMovement(TimeStampedModel):
         """
         from django.db import transaction
 
+        from .signals import notify_low_stock
+
         if quantity <= 0:
             raise ValueError("A quantidade deve ser maior que zero")
 
-        # Busca ou cria o StockItem de origem
-        stock_item_from, _ = StockItem.objects.get_or_create(
-            company=company,
-            product=product,
-            inventory=from_inventory,
-            defaults={"quantity_on_hand": 0},
-        )
-
-        # Verifica se há estoque suficiente
-        if stock_item_from.quantity_on_hand < quantity:
-            raise ValueError(
-                f"Estoque insuficiente. Disponível: {stock_item_from.quantity_on_hand}, "
-                f"Solicitado: {quantity}"
-            )
-
-        # Busca ou cria o StockItem de destino
-        stock_item_to, _ = StockItem.objects.get_or_create(
-            company=company,
-            product=product,
-            inventory=to_inventory,
-            defaults={"quantity_on_hand": 0},
-        )
-
         # Gera um UUID único para vincular os dois movimentos
         transfer_ref = uuid.uuid4()
 
         with transaction.atomic():
-            # Cria o movimento de saída
-            movement_out = cls.objects.create(
+            # Garante os StockItems de origem e destino em um único INSERT
+            # (ON CONFLICT DO NOTHING) e busca ambos em um único SELECT
+            StockItem.objects.bulk_create(
+                [
+                    StockItem(
+                        company=company,
+                        product=product,
+                        inventory=inventory,
+                        quantity_on_hand=0,
+                    )
+                    for inventory in (from_inventory, to_inventory)
+                ],
+                ignore_conflicts=True,
+            )
+            stock_items = {
+                item.inventory_id: item
+                for item in StockItem.objects.select_for_update().filter(
+                    company=company,
+                    product=product,
+                    inventory__in=[from_inventory, to_inventory],
+                )
+            }
+            stock_item_from = stock_items[from_inventory.pk]
+            stock_item_to = stock_items[to_inventory.pk]
+
+            # Verifica se há estoque suficiente
+            if stock_item_from.quantity_on_hand < quantity:
+                raise ValueError(
+                    f"Estoque insuficiente. Disponível: {stock_item_from.quantity_on_hand}, "
+                    f"Solicitado: {quantity}"
+                )
+
+            # Cria os movimentos de saída e de entrada
+            movement_out = cls(
                 stock_item=stock_item_from,
                 quantity_changed=-quantity,
                 type=cls.MovementType.OUT_TRANSFER,
@@ -207,13 +232,7 @@ class InventoryMovement(TimeStampedModel):
                 related_inventory=to_inventory,
                 transfer_reference=transfer_ref,
             )
-
-            # Atualiza o estoque de origem
-            stock_item_from.quantity_on_hand -= quantity
-            stock_item_from.save()
-
-            # Cria o movimento de entrada
-            movement_in = cls.objects.create(
+            movement_in = cls(
                 stock_item=stock_item_to,
                 quantity_changed=quantity,
                 type=cls.MovementType.IN_TRANSFER,
@@ -221,9 +240,20 @@ class InventoryMovement(TimeStampedModel):
                 related_inventory=from_inventory,
                 transfer_reference=transfer_ref,
             )
+            cls.objects.bulk_create([movement_out, movement_in])
 
-            # Atualiza o estoque de destino
+            # Atualiza os estoques de origem e destino em um único UPDATE
+            # (as linhas estão travadas pelo SELECT ... FOR UPDATE acima)
+            now = timezone.now()
+            stock_item_from.quantity_on_hand -= quantity
             stock_item_to.quantity_on_hand += quantity
-            stock_item_to.save()
+            stock_item_from.updated_at = stock_item_to.updated_at = now
+            StockItem.objects.bulk_update(
+                [stock_item_from, stock_item_to], ["quantity_on_hand", "updated_at"]
+            )
+
+            # bulk_update não dispara post_save: verifica o estoque mínimo aqui
+            notify_low_stock(stock_item_from)
+            notify_low_stock(stock_item_to)
 
         return movement_out, movement_in
@@ -0,0 +1,51 @@
+"""
+Particionamento mensal da tabela inventory_movements (PostgreSQL).
+
+A tabela é particionada por RANGE em created_at. Cada mês tem sua própria
+partição (inventory_movements_yYYYYmMM) e uma partição DEFAULT recebe qualquer
+linha fora das faixas já criadas.
+"""
+
+from datetime import date
+
+from django.db import connection as default_connection
+
+PARENT_TABLE = "inventory_movements"
+
+
+def _add_months(day: date, months: int) -> date:
+    month_index = day.month - 1 + months
+    return date(day.year + month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_name(month_start: date) -> str:
+    return f"{PARENT_TABLE}_y{month_start.year}m{month_start.month:02d}"
+
+
+def create_partition_sql(month_start: date) -> str:
+    month_end = _add_months(month_start, 1)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month_start)} "
+        f"PARTITION OF {PARENT_TABLE} "
+        f"FOR VALUES FROM ('{month_start.isoformat()} 00:00:00+00') "
+        f"TO ('{month_end.isoformat()} 00:00:00+00')"
+    )
+
+
+def ensure_monthly_partitions(start: date, months_ahead: int = 3, connection=None) -> list:
+    """
+    Cria (se necessário) as partições mensais de ``start`` até ``months_ahead``
+    meses à frente. Retorna os nomes das partições garantidas.
+    """
+    connection = connection or default_connection
+    if connection.vendor != "postgresql":
+        return []
+
+    first_month = date(start.year, start.month, 1)
+    names = []
+    with connection.cursor() as cursor:
+        for offset in range(months_ahead + 1):
+            month_start = _add_months(first_month, offset)
+            cursor.execute(create_partition_sql(month_start))
+            names.append(partition_name(month_start))
+    return names
@@ -2,8 +2,21 @@ from rest_framework import serializers
 from .models import ProductCategory, Product, Inventory, StockItem, InventoryMovement
 
 
-class ProductCategorySerializer(serializers.ModelSerializer):
-    company_name = serializers.CharField(source="company.name", read_only=True)
+class ActiveCompanyNameMixin:
+    """
+    Resolve company_name a partir da empresa ativa no contexto do serializer,
+    evitando carregar um Company por linha em listagens do mesmo tenant.
+    """
+
+    def get_company_name(self, obj):
+        company = self.context.get("company")
+        if company is not None and obj.company_id == company.pk:
+            return company.name
+        return obj.company.name
+
+
+class ProductCategorySerializer(ActiveCompanyNameMixin, serializers.ModelSerializer):
+    company_name = serializers.SerializerMethodField()
 
     class Meta:
         model = ProductCategory
@@ -18,11 +31,11 @@ class ProductCategorySerializer(serializers.ModelSerializer):
         read_only_fields = ("id", "created_at", "updated_at", "company_name", "company")
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(ActiveCompanyNameMixin, serializers.ModelSerializer):
     product_category_name = serializers.CharField(
         source="product_category.name", read_only=True
     )
-    company_name = serializers.CharField(source="company.name", read_only=True)
+    company_name = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
@@ -48,8 +61,26 @@ class ProductSerializer(serializers.ModelSerializer):
         )
 
 
-class InventorySerializer(serializers.ModelSerializer):
-    company_name = serializers.CharField(source="company.name", read_only=True)
+class ProductWriteSerializer(serializers.ModelSerializer):
+    """Usado em create/update: apenas PKs, sem campos desnormalizados."""
+
+    class Meta:
+        model = Product
+        fields = (
+            "id",
+            "name",
+            "product_category",
+            "min_stock_level",
+            "default_cost",
+            "company",
+            "created_at",
+            "updated_at",
+        )
+        read_only_fields = ("id", "created_at", "updated_at", "company")
+
+
+class InventorySerializer(ActiveCompanyNameMixin, serializers.ModelSerializer):
+    company_name = serializers.SerializerMethodField()
 
     class Meta:
         model = Inventory
@@ -64,7 +95,7 @@ class InventorySerializer(serializers.ModelSerializer):
         read_only_fields = ("id", "created_at", "updated_at", "company_name", "company")
 
 
-class StockItemSerializer(serializers.ModelSerializer):
+class StockItemSerializer(ActiveCompanyNameMixin, serializers.ModelSerializer):
     product_name = serializers.CharField(source="product.name", read_only=True)
     product_id = serializers.UUIDField(source="product.id", read_only=True)
     product_category_name = serializers.CharField(
@@ -74,7 +105,7 @@ class StockItemSerializer(serializers.ModelSerializer):
         source="product.default_cost", max_digits=15, decimal_places=2, read_only=True
     )
     inventory_name = serializers.CharField(source="inventory.name", read_only=True)
-    company_name = serializers.CharField(source="company.name", read_only=True)
+    company_name = serializers.SerializerMethodField()
 
     class Meta:
         model = StockItem
@@ -107,6 +138,24 @@ class StockItemSerializer(serializers.ModelSerializer):
             "company",
         )
 
+
+class StockItemWriteSerializer(serializers.ModelSerializer):
+    """Usado em create/update: apenas PKs, sem campos desnormalizados."""
+
+    class Meta:
+        model = StockItem
+        fields = (
+            "id",
+            "company",
+            "product",
+            "min_stock_level",
+            "inventory",
+            "quantity_on_hand",
+            "created_at",
+            "updated_at",
+        )
+        read_only_fields = ("id", "created_at", "updated_at", "company")
+
     def validate(self, attrs):
         company = self.context.get("company")
         if company:
@@ -131,7 +180,7 @@ class StockItemSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class InventoryMovementSerializer(serializers.ModelSerializer):
+class InventoryMovementSerializer(ActiveCompanyNameMixin, serializers.ModelSerializer):
     stock_item_product_name = serializers.CharField(
         source="stock_item.product.name", read_only=True
     )
@@ -141,7 +190,7 @@ class InventoryMovementSerializer(serializers.ModelSerializer):
     stock_item_inventory_id = serializers.UUIDField(
         source="stock_item.inventory.id", read_only=True
     )
-    company_name = serializers.CharField(source="company.name", read_only=True)
+    company_name = serializers.SerializerMethodField()
     type_display = serializers.CharField(source="get_type_display", read_only=True)
     user_name = serializers.SerializerMethodField()
 
@@ -182,3 +231,39 @@ class InventoryMovementSerializer(serializers.ModelSerializer):
                 obj.user, "full_name", f"{obj.user.first_name} {obj.user.last_name}"
             )
         return None
+
+
+class TransferSerializer(serializers.Serializer):
+    """Entrada do endpoint de transferência entre inventários."""
+
+    stock_item = serializers.PrimaryKeyRelatedField(
+        queryset=StockItem.objects.select_related("inventory", "product"),
+        error_messages={"does_not_exist": "Item de estoque não encontrado"},
+    )
+    destination_inventory = serializers.PrimaryKeyRelatedField(
+        queryset=Inventory.objects.only("id", "company_id"),
+        error_messages={"does_not_exist": "Inventário de destino não encontrado"},
+    )
+    quantity = serializers.IntegerField(
+        min_value=1,
+        error_messages={
+            "invalid": "Quantidade inválida",
+            "min_value": "A quantidade deve ser maior que zero",
+        },
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        company = self.context.get("company")
+        if company is not None:
+            # Restringe as buscas à empresa ativa
+            for field_name in ("stock_item", "destination_inventory"):
+                field = self.fields[field_name]
+                field.queryset = field.queryset.filter(company=company)
+
+    def validate(self, attrs):
+        if attrs["stock_item"].inventory_id == attrs["destination_inventory"].id:
+            raise serializers.ValidationError(
+                "Não é possível transferir para o mesmo inventário"
+            )
+        return attrs
@@ -6,8 +6,13 @@ from apps.notifications.models import Notification
 
 @receiver(post_save, sender=StockItem)
 def check_stock_levels(sender, instance, created, **kwargs):
+    notify_low_stock(instance)
+
+
+def notify_low_stock(instance):
     """
     Verifica se o nível de estoque está abaixo do mínimo e cria uma notificação.
+    Chamado também após UPDATEs com F(), que não disparam post_save.
     """
     # Use StockItem.min_stock_level as this is the specific threshold for this inventory location
     min_level = instance.min_stock_level
@@ -23,7 +28,7 @@ def check_stock_levels(sender, instance, created, **kwargs):
 
         if not has_unread:
             Notification.objects.create(
-                company=instance.company,
+                company_id=instance.company_id,
                 title="Alerta de Estoque Baixo",
                 message=f"O produto {instance.product.name} (Estoque: {instance.inventory.name}) atingiu o nível mínimo ({min_level}). Quantidade atual: {instance.quantity_on_hand}.",
                 link_to_stock_item=instance,
@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+from celery import shared_task
+from django.utils import timezone
+
+from .partitions import ensure_monthly_partitions
+
+
+@shared_task(name='inventory.create_movement_partitions')
+def create_movement_partitions(months_ahead: int = 3) -> int:
+    """Ensure monthly inventory_movements partitions exist for the coming months."""
+    return len(ensure_monthly_partitions(timezone.now().date(), months_ahead=months_ahead))
@@ -1,30 +1,50 @@
+from django.db import transaction
+from django.db.models import Exists, OuterRef
 from rest_framework import permissions, viewsets, status
 from rest_framework.decorators import action
+from rest_framework.settings import api_settings
 from rest_framework.response import Response
 from rest_framework.exceptions import PermissionDenied, ValidationError
 
 from apps.companies.models import Membership
 from apps.financials.mixins import ActiveCompanyMixin
 from apps.financials.permissions import IsCompanyMember
+from fintelis.renderers import ORJSONRenderer
 from .models import ProductCategory, Product, Inventory, StockItem, InventoryMovement
+from .signals import notify_low_stock
 from .serializers import (
     ProductCategorySerializer,
     ProductSerializer,
+    ProductWriteSerializer,
     InventorySerializer,
     StockItemSerializer,
+    StockItemWriteSerializer,
     InventoryMovementSerializer,
+    TransferSerializer,
 )
 
 
 class CompanyScopedViewSet(ActiveCompanyMixin, viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated, IsCompanyMember]
+    renderer_classes = [ORJSONRenderer, *api_settings.DEFAULT_RENDERER_CLASSES]
     company_field = "company"
+    # Serializer opcional sem campos desnormalizados para create/update.
+    write_serializer_class = None
 
     def get_queryset(self):
         queryset = super().get_queryset()
         company = self.get_active_company()
         return queryset.filter(**{self.company_field: company})
 
+    def get_serializer_class(self):
+        if self.write_serializer_class and self.action in (
+            "create",
+            "update",
+            "partial_update",
+        ):
+            return self.write_serializer_class
+        return super().get_serializer_class()
+
     def perform_create(self, serializer):
         serializer.save(**{self.company_field: self.get_active_company()})
 
@@ -38,32 +58,44 @@ class CompanyScopedViewSet(ActiveCompanyMixin, viewsets.ModelViewSet):
 
 
 class ProductCategoryViewSet(CompanyScopedViewSet):
-    queryset = ProductCategory.objects.all().select_related("company")
+    queryset = ProductCategory.objects.all()
     serializer_class = ProductCategorySerializer
 
     def get_queryset(self):
         queryset = super().get_queryset()
         inventory_id = self.request.query_params.get("inventory_id")
         if inventory_id:
+            # EXISTS evita o DISTINCT sobre o JOIN de três tabelas
             queryset = queryset.filter(
-                products__stock_items__inventory_id=inventory_id
-            ).distinct()
+                Exists(
+                    StockItem.objects.filter(
+                        product__product_category=OuterRef("pk"),
+                        inventory_id=inventory_id,
+                    )
+                )
+            )
         return queryset
 
 
 class ProductViewSet(CompanyScopedViewSet):
-    queryset = Product.objects.all().select_related("company", "product_category")
+    queryset = Product.objects.all().select_related("product_category")
     serializer_class = ProductSerializer
+    write_serializer_class = ProductWriteSerializer
 
 
 class InventoryViewSet(CompanyScopedViewSet):
-    queryset = Inventory.objects.all().select_related("company")
+    queryset = Inventory.objects.all()
     serializer_class = InventorySerializer
 
 
 class StockItemViewSet(CompanyScopedViewSet):
-    queryset = StockItem.objects.all().select_related("company", "product", "inventory")
+    queryset = (
+        StockItem.objects.all()
+        .select_related("product", "inventory")
+        .order_by("product__name", "inventory__name")
+    )
     serializer_class = StockItemSerializer
+    write_serializer_class = StockItemWriteSerializer
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -75,7 +107,7 @@ class StockItemViewSet(CompanyScopedViewSet):
 
 class InventoryMovementViewSet(CompanyScopedViewSet):
     queryset = InventoryMovement.objects.all().select_related(
-        "company", "stock_item", "stock_item__product", "stock_item__inventory"
+        "stock_item", "stock_item__product", "stock_item__inventory"
     )
     serializer_class = InventoryMovementSerializer
 
@@ -83,24 +115,48 @@ class InventoryMovementViewSet(CompanyScopedViewSet):
         queryset = super().get_queryset()
         inventory_id = self.request.query_params.get("inventory")
         if inventory_id:
-            queryset = queryset.filter(stock_item__inventory=inventory_id)
+            queryset = queryset.filter(stock_item__inventory_id=inventory_id)
 
         stock_item_id = self.request.query_params.get("stock_item")
         if stock_item_id:
             queryset = queryset.filter(stock_item_id=stock_item_id)
 
+        if self.action == "destroy":
+            # Para reverter o estoque basta a quantidade e o StockItem enxuto, mais
+            # os campos que notify_low_stock lê para montar o alerta
+            queryset = (
+                queryset.select_related(None)
+                .select_related("stock_item__product", "stock_item__inventory")
+                .only(
+                    "id",
+                    "company_id",
+                    "quantity_changed",
+                    "stock_item__id",
+                    "stock_item__company_id",
+                    "stock_item__quantity_on_hand",
+                    "stock_item__min_stock_level",
+                    "stock_item__product__id",
+                    "stock_item__product__name",
+                    "stock_item__inventory__id",
+                    "stock_item__inventory__name",
+                )
+            )
+
         return queryset
 
+    def _apply_stock_delta(self, stock_item, delta):
+        stock_item.apply_quantity_delta(delta)
+        notify_low_stock(stock_item)
+
     def perform_create(self, serializer):
         company = self.get_active_company()
 
         # Atualiza a quantidade do item de estoque
         stock_item = serializer.validated_data["stock_item"]
         quantity_changed = serializer.validated_data["quantity_changed"]
-        stock_item.quantity_on_hand += quantity_changed
-        stock_item.save()
-
-        serializer.save(company=company, user=self.request.user)
+        with transaction.atomic():
+            self._apply_stock_delta(stock_item, quantity_changed)
+            serializer.save(company=company, user=self.request.user)
 
     def perform_update(self, serializer):
         # Ensure company access is checked via get_active_company in parent/mixin,
@@ -113,26 +169,26 @@ class InventoryMovementViewSet(CompanyScopedViewSet):
         old_movement = serializer.instance
         old_quantity = old_movement.quantity_changed
         old_stock_item = old_movement.stock_item
-
-        # Reverte quantidade antiga
-        old_stock_item.quantity_on_hand -= old_quantity
-        old_stock_item.save()
-
-        # Aplica nova quantidade
         new_quantity = serializer.validated_data.get("quantity_changed", old_quantity)
         new_stock_item = serializer.validated_data.get("stock_item", old_stock_item)
-        new_stock_item.quantity_on_hand += new_quantity
-        new_stock_item.save()
 
-        serializer.save()
+        with transaction.atomic():
+            if new_stock_item.pk == old_stock_item.pk:
+                # Mesmo item de estoque: aplica apenas a diferença em um UPDATE
+                if new_quantity != old_quantity:
+                    self._apply_stock_delta(old_stock_item, new_quantity - old_quantity)
+            else:
+                # Reverte quantidade antiga
+                self._apply_stock_delta(old_stock_item, -old_quantity)
+                # Aplica nova quantidade
+                self._apply_stock_delta(new_stock_item, new_quantity)
+            serializer.save()
 
     def perform_destroy(self, instance):
         # Reverte a movimentação ao deletar
-        stock_item = instance.stock_item
-        stock_item.quantity_on_hand -= instance.quantity_changed
-        stock_item.save()
-
-        instance.delete()
+        with transaction.atomic():
+            self._apply_stock_delta(instance.stock_item, -instance.quantity_changed)
+            instance.delete()
 
     @action(detail=False, methods=["post"], url_path="transfer")
     def transfer(self, request):
@@ -142,57 +198,13 @@ class InventoryMovementViewSet(CompanyScopedViewSet):
         """
         company = self.get_active_company()
 
-        stock_item_id = request.data.get("stock_item")
-        destination_inventory_id = request.data.get("destination_inventory")
-        quantity = request.data.get("quantity")
-
-        # Validações
-        if not all([stock_item_id, destination_inventory_id, quantity]):
-            return Response(
-                {
-                    "error": "Campos obrigatórios: stock_item, destination_inventory, quantity"
-                },
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        try:
-            quantity = int(quantity)
-            if quantity <= 0:
-                return Response(
-                    {"error": "A quantidade deve ser maior que zero"},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-        except (ValueError, TypeError):
-            return Response(
-                {"error": "Quantidade inválida"}, status=status.HTTP_400_BAD_REQUEST
-            )
-
-        # Busca o stock_item
-        try:
-            stock_item = StockItem.objects.get(id=stock_item_id, company=company)
-        except StockItem.DoesNotExist:
-            return Response(
-                {"error": "Item de estoque não encontrado"},
-                status=status.HTTP_404_NOT_FOUND,
-            )
-
-        # Busca o inventário de destino
-        try:
-            destination_inventory = Inventory.objects.get(
-                id=destination_inventory_id, company=company
-            )
-        except Inventory.DoesNotExist:
-            return Response(
-                {"error": "Inventário de destino não encontrado"},
-                status=status.HTTP_404_NOT_FOUND,
-            )
-
-        # Verifica se não está transferindo para o mesmo inventário
-        if stock_item.inventory.id == destination_inventory.id:
-            return Response(
-                {"error": "Não é possível transferir para o mesmo inventário"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+        transfer_serializer = TransferSerializer(
+            data=request.data, context={"company": company}
+        )
+        transfer_serializer.is_valid(raise_exception=True)
+        stock_item = transfer_serializer.validated_data["stock_item"]
+        destination_inventory = transfer_serializer.validated_data["destination_inventory"]
+        quantity = transfer_serializer.validated_data["quantity"]
 
         # Cria a transferência usando o método do modelo
         try:
@@ -204,8 +216,16 @@ class InventoryMovementViewSet(CompanyScopedViewSet):
                 company=company,
             )
 
+            # Recarrega os dois movimentos com as relações usadas pelo serializer
+            # em uma única query, em vez de carregá-las linha a linha
+            movements = InventoryMovement.objects.select_related(
+                "stock_item__product", "stock_item__inventory"
+            ).in_bulk([movement_out.pk, movement_in.pk])
+
             # Serializa os movimentos para retornar
-            serializer = self.get_serializer([movement_out, movement_in], many=True)
+            serializer = self.get_serializer(
+                [movements[movement_out.pk], movements[movement_in.pk]], many=True
+            )
 
             return Response(
                 {
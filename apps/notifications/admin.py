@@ -9,6 +9,11 @@ class NotificationAdmin(admin.ModelAdmin):
     search_fields = ('title', 'message', 'company__name')
     readonly_fields = ('id', 'created_at', 'updated_at')
     list_editable = ('is_read',)
+    list_select_related = (
+        'company',
+        'link_to_stock_item__product',
+        'link_to_stock_item__inventory',
+    )
     date_hierarchy = 'created_at'
     
     fieldsets = (
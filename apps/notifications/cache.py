@@ -0,0 +1,35 @@
+from django.core.cache import cache
+from django.db import transaction
+
+# TTL curto: a listagem é consultada em polling e muda pouco.
+LIST_CACHE_TIMEOUT = 15
+
+
+def _company_version_key(company_id):
+    return f"notifications_version:company:{company_id}"
+
+
+def list_cache_key(user_id, company_ids, scope):
+    """
+    Monta a chave da listagem com as versões das empresas.
+    Incrementar qualquer versão invalida as listagens antigas.
+    """
+    version_keys = [_company_version_key(company_id) for company_id in sorted(map(str, company_ids))]
+    try:
+        versions = cache.get_many(version_keys)
+    except Exception:
+        return None  # Sem cache disponível, segue sem cachear
+    version_token = ".".join(str(versions.get(key, 0)) for key in version_keys)
+    return f"notifications:list:{user_id}:{scope}:{version_token}"
+
+
+def _bump(version_key):
+    try:
+        current_version = cache.get(version_key, 0)
+        cache.set(version_key, current_version + 1, timeout=None)
+    except Exception:
+        pass  # Se falhar, não é crítico: o TTL curto limita o tempo desatualizado
+
+
+def invalidate_company_notifications(company_id):
+    transaction.on_commit(lambda: _bump(_company_version_key(company_id)))
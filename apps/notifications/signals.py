@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_company_notifications
+from .models import Notification
+
+
+@receiver(post_save, sender=Notification)
+def notifications_cache_post_save(sender, instance: Notification, **kwargs):
+    invalidate_company_notifications(instance.company_id)
+
+
+@receiver(post_delete, sender=Notification)
+def notifications_cache_post_delete(sender, instance: Notification, **kwargs):
+    invalidate_company_notifications(instance.company_id)
@@ -1,14 +1,22 @@
+from django.core.cache import cache
+from django.utils import timezone
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from apps.companies.cache import get_user_company_ids
+from .cache import LIST_CACHE_TIMEOUT, invalidate_company_notifications, list_cache_key
 from .models import Notification
 from rest_framework import serializers
 import uuid
 
 
 class NotificationSerializer(serializers.ModelSerializer):
-    link_to_stock_item = serializers.PrimaryKeyRelatedField(read_only=True)
+    # Read the FK column directly; no StockItem instance is loaded.
+    link_to_stock_item = serializers.UUIDField(
+        source="link_to_stock_item_id", read_only=True, allow_null=True
+    )
 
     class Meta:
         model = Notification
@@ -26,32 +34,66 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
 
+    def _user_company_ids(self) -> set:
+        """Membership company ids, read from the cache once per request."""
+        if not hasattr(self.request, "_user_company_ids"):
+            self.request._user_company_ids = get_user_company_ids(self.request.user.pk)
+        return self.request._user_company_ids
+
     def get_queryset(self):
+        # Restrict to the user's companies using the cached membership ids,
+        # avoiding a JOIN on membership for every request.
+        company_ids = self._user_company_ids()
+        queryset = Notification.objects.filter(company_id__in=company_ids).order_by(
+            "-created_at"
+        )
+
         # Get company from query param or fallback to all user companies
         company_id = self.request.query_params.get("company")
-        user_companies = self.request.user.memberships.values_list("company", flat=True)
-
         if company_id:
-            # Ensure user has access to this company
-            # Convert string UUID to UUID object for comparison if needed,
-            # but values_list returns UUID objects usually.
             try:
-                target_company_uuid = uuid.UUID(company_id)
-                if target_company_uuid in user_companies:
-                    return Notification.objects.filter(company_id=company_id).order_by(
-                        "-created_at"
-                    )
+                uuid.UUID(company_id)
             except ValueError:
-                pass  # Invalid UUID string
-            return Notification.objects.none()
+                return Notification.objects.none()  # Invalid UUID string
+            queryset = queryset.filter(company_id=company_id)
 
-        return Notification.objects.filter(company__in=user_companies).order_by(
-            "-created_at"
-        )
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        company_id = request.query_params.get("company")
+        if company_id:
+            company_ids = [company_id]
+        else:
+            company_ids = self._user_company_ids()
+
+        cache_key = list_cache_key(request.user.pk, company_ids, company_id or "all")
+        if cache_key:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return Response(cached)
+
+        response = super().list(request, *args, **kwargs)
+        if cache_key:
+            cache.set(cache_key, response.data, LIST_CACHE_TIMEOUT)
+        return response
 
     @action(detail=True, methods=["post"])
     def mark_as_read(self, request, pk=None):
-        notification = self.get_object()
-        notification.is_read = True
-        notification.save()
+        try:
+            uuid.UUID(str(pk))
+        except ValueError:
+            raise NotFound()
+
+        # Read state is shared by the company: fetch only its id, then a single
+        # UPDATE (no full-row save).
+        notifications = Notification.objects.filter(
+            pk=pk, company_id__in=self._user_company_ids()
+        )
+        company_id = notifications.values_list("company_id", flat=True).first()
+        if company_id is None:
+            raise NotFound()
+        notifications.update(is_read=True, updated_at=timezone.now())
+        # The queryset update skips post_save, so bump the company's list
+        # version here, as the signal handlers do.
+        invalidate_company_notifications(company_id)
         return Response({"status": "marked as read"})
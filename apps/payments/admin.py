@@ -1,8 +1,55 @@
+from functools import lru_cache
+
 from django.contrib import admin
-from django.utils.html import format_html
+from django.db import transaction
+from django.db.models import Count, Value
+from django.db.models.functions import Coalesce
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from apps.companies.models import Company
+from fintelis.paginators import CachedCountPaginator
 from .models import SubscriptionPlan, Subscription, Payment
 
 
+@lru_cache(maxsize=None)
+def _admin_url_template(viewname):
+    """
+    Resolve a URL do admin uma única vez e devolve um template com "{}" no
+    lugar do id (resolvido sob demanda: o URLconf não está pronto no import).
+    """
+    if viewname.endswith("_change"):
+        return reverse(viewname, args=[0]).replace("/0/", "/{}/")
+    return reverse(viewname)
+
+
+_LINK_TEMPLATE = '<a href="{url}">{label}</a>'
+
+
+def _admin_link(viewname, object_id, label):
+    """Link para a página de edição do admin (só as partes dinâmicas são escapadas)."""
+    url = _admin_url_template(viewname).format(object_id)
+    return mark_safe(_LINK_TEMPLATE.format(url=escape(url), label=escape(label)))
+
+
+class SubscriptionListFilter(admin.RelatedFieldListFilter):
+    """
+    Filtro por assinatura que carrega as opções com a empresa no mesmo SELECT
+    (Subscription.__str__ usa company.name).
+    """
+
+    def field_choices(self, field, request, model_admin):
+        ordering = self.field_admin_ordering(field, request, model_admin) or ()
+        subscriptions = (
+            Subscription.objects.select_related("company")
+            .only("id", "preapproval_id", "is_trial", "company__name")
+            .order_by(*ordering)
+        )
+        return [(subscription.pk, str(subscription)) for subscription in subscriptions]
+
+
 class PaymentInline(admin.TabularInline):
     """Inline para mostrar payments relacionados a uma subscription."""
     model = Payment
@@ -30,6 +77,10 @@ class PaymentInline(admin.TabularInline):
     can_delete = False
     show_change_link = True
 
+    def get_queryset(self, request):
+        # Payment.__str__ (exibido em cada linha do inline) usa company.name
+        return super().get_queryset(request).select_related("company")
+
 
 @admin.register(SubscriptionPlan)
 class SubscriptionPlanAdmin(admin.ModelAdmin):
@@ -64,6 +115,10 @@ class SubscriptionPlanAdmin(admin.ModelAdmin):
     date_hierarchy = "created_at"
     ordering = ("-created_at",)
 
+    def get_queryset(self, request):
+        # O JSON do Mercado Pago só aparece no formulário (carregado sob demanda)
+        return super().get_queryset(request).defer("mercadopago_response")
+
     fieldsets = (
         (
             "Plan Information",
@@ -167,42 +222,45 @@ class SubscriptionAdmin(admin.ModelAdmin):
         "plan_link",
     )
     list_per_page = 25
+    list_select_related = ("company", "plan")
     date_hierarchy = "created_at"
     ordering = ("-created_at",)
     inlines = [PaymentInline]
     
+    def get_queryset(self, request):
+        # Conta os payments na mesma query da listagem (evita um COUNT por linha);
+        # o JSON do Mercado Pago só aparece no formulário (carregado sob demanda)
+        return (
+            super()
+            .get_queryset(request)
+            .defer("mercadopago_response")
+            .annotate(_payments_count=Count("payments"))
+        )
+
     def payments_count(self, obj):
         """Mostra quantidade de payments relacionados."""
-        count = obj.payments.count()
+        count = getattr(obj, "_payments_count", None)
+        if count is None:
+            count = obj.payments.count()
         if count > 0:
-            return format_html(
-                '<a href="{}?subscription__id__exact={}">{} pagamento(s)</a>',
-                f"/admin/payments/payment/",
-                obj.id,
-                count
+            url = f'{_admin_url_template("admin:payments_payment_changelist")}?subscription__id__exact={obj.id}'
+            return mark_safe(
+                _LINK_TEMPLATE.format(url=escape(url), label=f"{count} pagamento(s)")
             )
         return "0"
     payments_count.short_description = "Pagamentos"
     
     def company_link(self, obj):
         """Mostra link para a empresa."""
-        if obj.company:
-            return format_html(
-                '<a href="/admin/companies/company/{}/change/">{}</a>',
-                obj.company.id,
-                obj.company.name
-            )
+        if obj.company_id:
+            return _admin_link("admin:companies_company_change", obj.company_id, obj.company.name)
         return "-"
     company_link.short_description = "Empresa"
     
     def plan_link(self, obj):
         """Mostra link para o plano."""
-        if obj.plan:
-            return format_html(
-                '<a href="/admin/payments/subscriptionplan/{}/change/">{}</a>',
-                obj.plan.id,
-                obj.plan.reason
-            )
+        if obj.plan_id:
+            return _admin_link("admin:payments_subscriptionplan_change", obj.plan_id, obj.plan.reason)
         return "-"
     plan_link.short_description = "Plano"
 
@@ -252,20 +310,72 @@ class SubscriptionAdmin(admin.ModelAdmin):
     actions = ["activate_subscriptions", "cancel_subscriptions"]
 
     def activate_subscriptions(self, request, queryset):
-        for subscription in queryset:
-            subscription.activate()
-        self.message_user(request, f"{queryset.count()} subscriptions activated.")
+        now = timezone.now()
+        subscriptions = Subscription.objects.filter(
+            pk__in=list(queryset.values_list("pk", flat=True))
+        )
+        with transaction.atomic():
+            # Um único UPDATE para as assinaturas (start_date só se ainda não definido)
+            updated = subscriptions.update(
+                status=Subscription.Status.AUTHORIZED,
+                start_date=Coalesce("start_date", Value(now)),
+                updated_at=now,
+            )
+            companies = {}
+            activated = list(subscriptions.select_related("company", "plan"))
+            for subscription in activated:
+                subscription.company = companies.setdefault(
+                    subscription.company_id, subscription.company
+                )
+                # O UPDATE acima não passa por save(): recalcular expires_at aqui
+                subscription.refresh_expires_at()
+                subscription.apply_activation_to_company()
+            Subscription.objects.bulk_update(activated, ["expires_at"])
+            _bulk_update_companies(companies.values(), now)
+        self.message_user(request, f"{updated} subscriptions activated.")
 
     activate_subscriptions.short_description = "Activate selected subscriptions"
 
     def cancel_subscriptions(self, request, queryset):
-        for subscription in queryset:
-            subscription.cancel()
-        self.message_user(request, f"{queryset.count()} subscriptions cancelled.")
+        now = timezone.now()
+        subscriptions = Subscription.objects.filter(
+            pk__in=list(queryset.values_list("pk", flat=True))
+        )
+        with transaction.atomic():
+            updated = subscriptions.update(
+                status=Subscription.Status.CANCELLED, updated_at=now
+            )
+            companies = {}
+            changed = {}
+            for subscription in subscriptions.select_related("company"):
+                subscription.company = companies.setdefault(
+                    subscription.company_id, subscription.company
+                )
+                company = subscription.apply_cancellation_to_company()
+                if company is not None:
+                    changed[company.pk] = company
+            _bulk_update_companies(changed.values(), now)
+        self.message_user(request, f"{updated} subscriptions cancelled.")
 
     cancel_subscriptions.short_description = "Cancel selected subscriptions"
 
 
+def _bulk_update_companies(companies, now):
+    """Persiste os campos de assinatura das empresas em um único UPDATE."""
+    companies = list(companies)
+    for company in companies:
+        company.updated_at = now
+    Company.objects.bulk_update(
+        companies,
+        [
+            "subscription_active",
+            "subscription_started_at",
+            "subscription_expires_at",
+            "updated_at",
+        ],
+    )
+
+
 @admin.register(Payment)
 class PaymentAdmin(admin.ModelAdmin):
     list_display = (
@@ -284,7 +394,7 @@ class PaymentAdmin(admin.ModelAdmin):
         "status",
         "payment_method",
         "subscription_plan",
-        "subscription",
+        ("subscription", SubscriptionListFilter),
         "created_at",
     )
     search_fields = (
@@ -304,9 +414,21 @@ class PaymentAdmin(admin.ModelAdmin):
         "subscription_link",
     )
     list_per_page = 25
+    list_select_related = ("company", "subscription")
+    # Evita COUNT(*) na tabela inteira a cada página da listagem
+    paginator = CachedCountPaginator
+    show_full_result_count = False
     date_hierarchy = "created_at"
     ordering = ("-created_at",)
 
+    def get_queryset(self, request):
+        # Colunas pesadas ficam fora da listagem; o formulário as carrega sob demanda
+        return super().get_queryset(request).defer(
+            "gateway_response",
+            "pix_code",
+            "subscription__mercadopago_response",
+        )
+
     fieldsets = (
         ("Company Information", {"fields": ("company_link",)}),
         (
@@ -356,23 +478,15 @@ class PaymentAdmin(admin.ModelAdmin):
 
     def company_link(self, obj):
         """Mostra link para a empresa."""
-        if obj.company:
-            return format_html(
-                '<a href="/admin/companies/company/{}/change/">{}</a>',
-                obj.company.id,
-                obj.company.name
-            )
+        if obj.company_id:
+            return _admin_link("admin:companies_company_change", obj.company_id, obj.company.name)
         return "-"
     company_link.short_description = "Empresa"
     
     def subscription_link(self, obj):
         """Mostra link para a assinatura."""
-        if obj.subscription:
-            return format_html(
-                '<a href="/admin/payments/subscription/{}/change/">{}</a>',
-                obj.subscription.id,
-                obj.subscription.preapproval_id
-            )
+        if obj.subscription_id:
+            return _admin_link("admin:payments_subscription_change", obj.subscription_id, obj.subscription.preapproval_id)
         return "-"
     subscription_link.short_description = "Assinatura"
 
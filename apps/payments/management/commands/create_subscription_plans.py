@@ -17,8 +17,12 @@ Usage:
     python manage.py create_subscription_plans --enable-pix --recreate
 """
 
+from concurrent.futures import ThreadPoolExecutor
+
 from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
 from apps.payments.models import SubscriptionPlan, SubscriptionPlanType
 from apps.payments.mercadopago_service import get_mercadopago_service
 
@@ -111,30 +115,103 @@ class Command(BaseCommand):
         created_count = 0
         skipped_count = 0
         error_count = 0
-        
+        verbosity = options['verbosity']
+
+        # Configurações e planos ativos carregados uma única vez
+        configs = SubscriptionPlanType.get_all_configs()
+        existing_plans = {
+            plan.subscription_plan_type: plan
+            for plan in SubscriptionPlan.objects.filter(
+                subscription_plan_type__in=plans_to_create,
+                status='active',
+            ).only('id', 'subscription_plan_type', 'preapproval_plan_id')
+        }
+
+        pending = []
         for plan_type in plans_to_create:
             try:
-                result = self._create_plan(
-                    plan_type=plan_type,
-                    billing_day=billing_day,
-                    back_url=back_url,
-                    recreate=recreate,
-                    enable_pix=enable_pix
-                )
-                
-                if result == 'created':
-                    created_count += 1
-                elif result == 'skipped':
+                if self._should_create_plan(
+                    plan_type, configs.get(plan_type), existing_plans.get(plan_type), recreate
+                ):
+                    pending.append(plan_type)
+                else:
                     skipped_count += 1
-                    
             except Exception as e:
                 error_count += 1
+                self._report_error(plan_type, e, verbosity)
+
+        # Chamadas ao Mercado Pago são independentes: executa em paralelo
+        mp_responses = {}
+        if pending:
+            mp_service = get_mercadopago_service()
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                futures = {
+                    plan_type: executor.submit(
+                        self._create_mp_plan,
+                        mp_service,
+                        configs[plan_type],
+                        back_url,
+                        enable_pix,
+                    )
+                    for plan_type in pending
+                }
+                for plan_type, future in futures.items():
+                    self.stdout.write('')
+                    self.stdout.write(f'🌐 Mercado Pago: {plan_type.upper()}')
+                    try:
+                        mp_responses[plan_type] = future.result()
+                        self.stdout.write(
+                            self.style.SUCCESS(
+                                f'  ✅ Plano criado no Mercado Pago (ID: {mp_responses[plan_type]["id"]})'
+                            )
+                        )
+                    except Exception as e:
+                        error_count += 1
+                        self._report_mp_error(e)
+                        self._report_error(plan_type, e, verbosity)
+
+        # Salvar no banco de dados: desativa os antigos e cria os novos de uma vez
+        if mp_responses:
+            self.stdout.write('')
+            self.stdout.write('💾 Salvando no banco de dados...')
+            with transaction.atomic():
+                # Trava os planos ativos e refaz a checagem: outra execução pode
+                # ter criado o plano enquanto as chamadas ao Mercado Pago rodavam
+                active_now = set(
+                    SubscriptionPlan.objects.select_for_update()
+                    .filter(subscription_plan_type__in=list(mp_responses), status='active')
+                    .values_list('subscription_plan_type', flat=True)
+                )
+                if not recreate:
+                    for plan_type in active_now.intersection(mp_responses):
+                        del mp_responses[plan_type]
+                        skipped_count += 1
+                        self.stdout.write(
+                            self.style.WARNING(
+                                f'  ⏭️  Plano {plan_type} foi criado por outra execução; ignorando.'
+                            )
+                        )
+
+                # Desativar planos antigos (apenas dos tipos recriados com sucesso)
+                SubscriptionPlan.objects.filter(
+                    subscription_plan_type__in=list(mp_responses),
+                    status='active',
+                ).update(status='inactive', updated_at=timezone.now())
+
+                plans = SubscriptionPlan.objects.bulk_create(
+                    [
+                        self._build_plan(plan_type, configs[plan_type], mp_response, back_url)
+                        for plan_type, mp_response in mp_responses.items()
+                    ],
+                    batch_size=100,
+                )
+            for plan in plans:
                 self.stdout.write(
-                    self.style.ERROR(f'❌ Erro ao criar plano {plan_type}: {str(e)}')
+                    self.style.SUCCESS(
+                        f'  ✅ Plano {plan.subscription_plan_type} salvo no banco (UUID: {plan.id})'
+                    )
                 )
-                if options['verbosity'] >= 2:
-                    import traceback
-                    self.stdout.write(traceback.format_exc())
+            created_count = len(plans)
         
         # Resumo
         self.stdout.write('')
@@ -147,28 +224,28 @@ class Command(BaseCommand):
         self.stdout.write('')
         
         # Listar planos no banco
-        all_plans = SubscriptionPlan.objects.filter(status='active').order_by('subscription_plan_type')
-        if all_plans.exists():
-            self.stdout.write(self.style.SUCCESS('📦 Planos ativos no banco de dados:'))
-            for plan in all_plans:
-                self.stdout.write(
-                    f'  • {plan.subscription_plan_type}: R$ {plan.transaction_amount} '
-                    f'(ID: {plan.preapproval_plan_id})'
-                )
+        all_plans = (
+            SubscriptionPlan.objects.filter(status='active')
+            .order_by('subscription_plan_type')
+            .values_list('subscription_plan_type', 'transaction_amount', 'preapproval_plan_id')
+        )
+        header_written = False
+        for plan_type, amount, preapproval_plan_id in all_plans.iterator(chunk_size=100):
+            if not header_written:
+                self.stdout.write(self.style.SUCCESS('📦 Planos ativos no banco de dados:'))
+                header_written = True
+            self.stdout.write(f'  • {plan_type}: R$ {amount} (ID: {preapproval_plan_id})')
         
         self.stdout.write('')
         self.stdout.write(self.style.SUCCESS('✅ Processo concluído!'))
 
-    def _create_plan(self, plan_type, billing_day, back_url, recreate, enable_pix=False):
-        """Cria um plano específico."""
+    def _should_create_plan(self, plan_type, config, existing_plan, recreate):
+        """Mostra a configuração do plano e decide se ele deve ser criado."""
         
         self.stdout.write('')
         self.stdout.write(f'📝 Processando plano: {plan_type.upper()}')
         self.stdout.write('-' * 40)
         
-        # Obter configuração do plano
-        config = SubscriptionPlanType.get_config(plan_type)
-        
         if not config:
             raise CommandError(f'Configuração não encontrada para o plano: {plan_type}')
         
@@ -176,12 +253,6 @@ class Command(BaseCommand):
         self.stdout.write(f'  Valor: R$ {config["amount"]}')
         self.stdout.write(f'  Frequência: a cada {config["frequency"]} {config["frequency_type"]}')
         
-        # Verificar se já existe
-        existing_plan = SubscriptionPlan.objects.filter(
-            subscription_plan_type=plan_type,
-            status='active'
-        ).first()
-        
         if existing_plan and not recreate:
             self.stdout.write(
                 self.style.WARNING(
@@ -189,77 +260,35 @@ class Command(BaseCommand):
                     f'Use --recreate para recriar.'
                 )
             )
-            return 'skipped'
+            return False
         
-        # Desativar plano antigo se existir e --recreate foi usado
         if existing_plan and recreate:
-            self.stdout.write(f'  🔄 Desativando plano antigo...')
-            existing_plan.status = 'inactive'
-            existing_plan.save()
+            self.stdout.write(f'  🔄 O plano antigo será desativado após a criação do novo')
         
-        # Criar plano no Mercado Pago
-        self.stdout.write('  🌐 Criando plano no Mercado Pago...')
-        self.stdout.write(f'     Valor: R$ {config["amount"]}')
-        self.stdout.write(f'     Frequência: a cada {config["frequency"]} {config["frequency_type"]}')
-        self.stdout.write(f'     Cobrança: no dia da primeira compra')
-        if enable_pix:
-            self.stdout.write(f'     Métodos de pagamento: Cartão de Crédito, Débito e PIX')
-        
-        try:
-            mp_service = get_mercadopago_service()
-            
-            # Validar valores antes de enviar
-            if float(config['amount']) > 4000:
-                self.stdout.write(
-                    self.style.WARNING(
-                        f'  ⚠️  Valor R$ {config["amount"]} excede limite de R$ 4.000,00'
-                    )
-                )
-            
-            # Criar plano com PIX se habilitado
-            mp_response = mp_service.create_preapproval_plan(
-                reason=config['reason'],
-                transaction_amount=config['amount'],
-                frequency=config['frequency'],
-                frequency_type=config['frequency_type'],
-                back_url=back_url,
-                enable_pix=enable_pix,
-            )
-            
+        # Validar valores antes de enviar
+        if float(config['amount']) > 4000:
             self.stdout.write(
-                self.style.SUCCESS(f'  ✅ Plano criado no Mercado Pago (ID: {mp_response["id"]})')
-            )
-            
-        except Exception as e:
-            error_msg = str(e)
-            self.stdout.write(self.style.ERROR(f'  ❌ Erro: {error_msg}'))
-            
-            # Dar dicas baseadas no erro
-            if 'frequency' in error_msg.lower():
-                self.stdout.write(
-                    self.style.WARNING(
-                        '  💡 Dica: Verifique se a frequência está no formato correto.'
-                    )
-                )
-            elif 'amount' in error_msg.lower() or '4000' in error_msg:
-                self.stdout.write(
-                    self.style.WARNING(
-                        '  💡 Dica: O valor máximo permitido é R$ 4.000,00 por transação.'
-                    )
-                )
-            elif 'unauthorized' in error_msg.lower():
-                self.stdout.write(
-                    self.style.WARNING(
-                        '  💡 Dica: Use credenciais de TESTE para desenvolvimento.'
-                    )
+                self.style.WARNING(
+                    f'  ⚠️  Valor R$ {config["amount"]} excede limite de R$ 4.000,00'
                 )
-            
-            raise CommandError(f'Erro ao criar plano no Mercado Pago: {error_msg}')
-        
-        # Salvar no banco de dados
-        self.stdout.write('  💾 Salvando no banco de dados...')
-        
-        plan = SubscriptionPlan.objects.create(
+            )
+        return True
+
+    @staticmethod
+    def _create_mp_plan(mp_service, config, back_url, enable_pix):
+        """Cria o plano no Mercado Pago (executado em thread)."""
+        return mp_service.create_preapproval_plan(
+            reason=config['reason'],
+            transaction_amount=config['amount'],
+            frequency=config['frequency'],
+            frequency_type=config['frequency_type'],
+            back_url=back_url,
+            enable_pix=enable_pix,
+        )
+
+    @staticmethod
+    def _build_plan(plan_type, config, mp_response, back_url):
+        return SubscriptionPlan(
             preapproval_plan_id=mp_response['id'],
             reason=config['reason'],
             subscription_plan_type=plan_type,
@@ -267,16 +296,42 @@ class Command(BaseCommand):
             currency_id='BRL',
             frequency=config['frequency'],
             frequency_type=config['frequency_type'],
+            duration_days=config['duration_days'],
             billing_day=None,  # Cobra no dia da primeira compra
             init_point=mp_response.get('init_point', ''),
             back_url=back_url,
             status='active',
             mercadopago_response=mp_response,
         )
+
+    def _report_mp_error(self, error):
+        error_msg = str(error)
+        self.stdout.write(self.style.ERROR(f'  ❌ Erro: {error_msg}'))
         
+        # Dar dicas baseadas no erro
+        if 'frequency' in error_msg.lower():
+            self.stdout.write(
+                self.style.WARNING(
+                    '  💡 Dica: Verifique se a frequência está no formato correto.'
+                )
+            )
+        elif 'amount' in error_msg.lower() or '4000' in error_msg:
+            self.stdout.write(
+                self.style.WARNING(
+                    '  💡 Dica: O valor máximo permitido é R$ 4.000,00 por transação.'
+                )
+            )
+        elif 'unauthorized' in error_msg.lower():
+            self.stdout.write(
+                self.style.WARNING(
+                    '  💡 Dica: Use credenciais de TESTE para desenvolvimento.'
+                )
+            )
+
+    def _report_error(self, plan_type, error, verbosity):
         self.stdout.write(
-            self.style.SUCCESS(f'  ✅ Plano salvo no banco (UUID: {plan.id})')
+            self.style.ERROR(f'❌ Erro ao criar plano {plan_type}: {str(error)}')
         )
-        
-        return 'created'
-
+        if verbosity >= 2:
+            import traceback
+            self.stdout.write(traceback.format_exc())
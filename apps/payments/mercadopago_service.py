@@ -3,11 +3,250 @@ Serviço de integração com Mercado Pago para assinaturas.
 Documentação: https://www.mercadopago.com.br/developers/pt/reference/subscriptions/_preapproval_plan/post
 """
 
+import logging
 import os
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from types import MappingProxyType
+import time
+import uuid
+import orjson
 import requests
-import mercadopago
-from decimal import Decimal
-from typing import Dict, Any
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, Any, List
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# (conexão, leitura) em segundos: um socket travado não pode prender o worker.
+# A leitura pode ser ajustada por MERCADOPAGO_READ_TIMEOUT (um pouco acima do p95).
+CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 10
+
+# Chamadas simultâneas ao Mercado Pago por processo (igual ao tamanho do pool de conexões)
+MAX_CONCURRENT_REQUESTS = 20
+BULKHEAD_WAIT = 1
+
+# Planos praticamente não mudam depois de criados: cache curto evita um GET por checkout.
+# Depois de PLAN_CACHE_TIMEOUT a entrada fica "velha": é devolvida na hora e atualizada
+# em segundo plano (stale-while-revalidate), e serve de fallback se o Mercado Pago cair.
+PLAN_CACHE_TIMEOUT = 600
+PLAN_STALE_TIMEOUT = 6 * 60 * 60
+# 404 de plano fica em cache por pouco tempo para absorver rajadas de retentativas
+PLAN_MISSING_CACHE_TIMEOUT = 30
+# Lock da busca de plano (single-flight) e quanto tempo os demais esperam por ele
+PLAN_LOCK_TIMEOUT = 10
+PLAN_LOCK_WAIT = 5
+
+
+_CENTS = Decimal("0.01")
+
+_FREQUENCY_TYPES = frozenset({"months", "days"})
+
+# Métodos de pagamento aceitos nos planos (montados uma vez; só são lidos ao serializar)
+_PAYMENT_METHODS_NO_PIX = {
+    "payment_types": [
+        {"id": "credit_card"},
+        {"id": "debit_card"},
+    ],
+    "payment_methods": [],
+}
+_PAYMENT_METHODS_WITH_PIX = {
+    "payment_types": [
+        *_PAYMENT_METHODS_NO_PIX["payment_types"],
+        {"id": "bank_transfer"},  # PIX é um tipo de bank_transfer
+    ],
+    "payment_methods": [],
+}
+
+
+def _plan_cache_key(plan_id: str) -> str:
+    return f"mercadopago:preapproval_plan:{plan_id}"
+
+
+def _plan_missing_cache_key(plan_id: str) -> str:
+    return f"mercadopago:preapproval_plan_missing:v2:{plan_id}"
+
+
+def _jittered(timeout: int) -> int:
+    """Acrescenta até 10% ao TTL para as entradas não expirarem todas juntas."""
+    return timeout + random.randint(0, timeout // 10)
+
+
+def _cache_plan(plan_id: str, data: Dict[str, Any], etag: str = None):
+    entry = {
+        "data": data,
+        "etag": etag,
+        "fresh_until": time.time() + _jittered(PLAN_CACHE_TIMEOUT),
+    }
+    try:
+        cache.set(_plan_cache_key(plan_id), entry, _jittered(PLAN_STALE_TIMEOUT))
+    except Exception:
+        pass
+
+
+def _acquire_plan_lock(plan_id: str) -> bool:
+    """
+    Lock distribuído (cache.add é atômico no Redis) para uma única busca do
+    plano por vez. Se o cache falhar, segue sem lock.
+    """
+    try:
+        return cache.add(f"{_plan_cache_key(plan_id)}:lock", 1, PLAN_LOCK_TIMEOUT)
+    except Exception:
+        return True
+
+
+def _release_plan_lock(plan_id: str):
+    try:
+        cache.delete(f"{_plan_cache_key(plan_id)}:lock")
+    except Exception:
+        pass
+
+
+def _wait_for_cached_plan(plan_id: str):
+    """
+    Espera outro worker preencher o cache; devolve None se não vier a tempo.
+    Se o outro worker recebeu 404, levanta o mesmo MercadoPagoError na hora.
+    """
+    cache_key = _plan_cache_key(plan_id)
+    missing_key = _plan_missing_cache_key(plan_id)
+    deadline = time.monotonic() + PLAN_LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(0.1)
+        try:
+            cached = cache.get_many([cache_key, missing_key])
+        except Exception:
+            return None
+        if cache_key in cached:
+            return cached[cache_key]["data"]
+        if missing_key in cached:
+            raise _missing_plan_error(cached[missing_key])
+    return None
+
+
+def _idempotency_headers() -> Dict[str, str]:
+    """
+    Chave única por operação: se a requisição for reenviada (retry), o
+    Mercado Pago reconhece a chave e não cria o recurso duas vezes.
+    """
+    return {"X-Idempotency-Key": uuid.uuid4().hex}
+
+
+# Campos que nunca vão para o log (dados pessoais / de cartão)
+_REDACT_KEYS = frozenset({
+    "payer_email",
+    "card_token_id",
+    "card_number",
+    "security_code",
+    "cardholder",
+    "identification",
+})
+
+
+def _redact(data):
+    """Cópia de ``data`` com os campos sensíveis mascarados, para logging."""
+    if isinstance(data, dict):
+        return {
+            key: "***" if key in _REDACT_KEYS else _redact(value)
+            for key, value in data.items()
+        }
+    if isinstance(data, list):
+        return [_redact(item) for item in data]
+    return data
+
+
+def _error_body(response) -> Dict[str, Any]:
+    """Corpo de erro do Mercado Pago (bytes decodificados direto pelo orjson)."""
+    if not response.content:
+        return {}
+    try:
+        return orjson.loads(response.content)
+    except orjson.JSONDecodeError:
+        return {"message": response.text}
+
+
+class _UpstreamUnavailable(Exception):
+    """Falha de rede ou 5xx do Mercado Pago (não é um erro do pedido em si)."""
+
+
+class MercadoPagoUnavailable(_UpstreamUnavailable):
+    """Circuito aberto: o Mercado Pago vem falhando e a chamada nem foi feita."""
+
+
+class MercadoPagoError(Exception):
+    """Resposta de erro do Mercado Pago (status HTTP fora do esperado)."""
+
+    def __init__(self, message: str, status_code: int, data: Dict[str, Any]):
+        super().__init__(message)
+        self.status_code = status_code
+        self.data = data
+
+
+def _missing_plan_error(missing: Dict[str, Any]) -> MercadoPagoError:
+    """Reconstrói o erro 404 guardado no cache negativo de planos."""
+    return MercadoPagoError(missing["message"], 404, missing["data"])
+
+
+def _clear_error_message(error_data) -> str:
+    """Extrai a mensagem de erro mais clara do corpo de erro do Mercado Pago."""
+    if not isinstance(error_data, dict):
+        return str(error_data)
+    error_message = error_data.get("message", str(error_data))
+    causes = error_data.get("cause", [])
+    if causes and isinstance(causes, list):
+        error_message = causes[0].get("description", error_message)
+    return error_message
+
+
+class _CircuitBreaker:
+    """
+    Circuit breaker simples por recurso do Mercado Pago.
+
+    Depois de ``fail_max`` falhas seguidas (erro de rede ou 5xx) o circuito abre
+    e as chamadas falham na hora com MercadoPagoUnavailable. Passado
+    ``reset_timeout`` segundos, uma única chamada de teste é liberada: se der
+    certo o circuito fecha, se falhar ele abre de novo.
+    """
+
+    def __init__(self, name: str, fail_max: int = 5, reset_timeout: int = 30):
+        self.name = name
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if self._probing or time.monotonic() - self._opened_at < self.reset_timeout:
+                raise MercadoPagoUnavailable(
+                    f"Mercado Pago indisponível ({self.name}). Tente novamente em instantes."
+                )
+            self._probing = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._failures >= self.fail_max:
+                if self._opened_at is None:
+                    logger.warning("Circuito do Mercado Pago aberto: %s", self.name)
+                self._opened_at = time.monotonic()
 
 
 class MercadoPagoService:
@@ -17,20 +256,170 @@ class MercadoPagoService:
 
     def __init__(self):
         """
-        Inicializa o SDK do Mercado Pago com o access token.
+        Inicializa a sessão HTTP do Mercado Pago com o access token.
         """
-        access_token = os.environ.get("MERCADOPAGO_ACCESS_TOKEN")
+        # Lido uma vez no boot pelo settings (que já sinaliza se está faltando)
+        access_token = settings.MERCADOPAGO_ACCESS_TOKEN
         if not access_token:
             raise ValueError("MERCADOPAGO_ACCESS_TOKEN não configurado no ambiente")
 
         self.access_token = access_token
-        self.sdk = mercadopago.SDK(access_token)
         self.base_url = "https://api.mercadopago.com"
-        self.headers = {
+        self.connect_timeout = CONNECT_TIMEOUT
+        self.read_timeout = float(
+            os.environ.get("MERCADOPAGO_READ_TIMEOUT", DEFAULT_READ_TIMEOUT)
+        )
+        self.timeout = (self.connect_timeout, self.read_timeout)
+        # Somente leitura: aplicados uma única vez na sessão
+        self.headers = MappingProxyType({
             "Authorization": f"Bearer {access_token}",
             "Content-Type": "application/json",
+        })
+
+        # Sessão persistente: reaproveita conexões TCP/TLS (keep-alive) entre chamadas
+        self.session = requests.Session()
+        # Mantém o Accept-Encoding padrão da sessão (gzip/deflate)
+        self.session.headers.update(self.headers)
+        # POSTs levam X-Idempotency-Key, então também podem ser repetidos com segurança
+        retry = Retry(
+            total=3,
+            backoff_factor=0.3,
+            backoff_jitter=0.3,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET", "PUT", "POST"],
+            raise_on_status=False,
+        )
+        self.session.mount(
+            "https://",
+            HTTPAdapter(
+                pool_connections=10,
+                pool_maxsize=MAX_CONCURRENT_REQUESTS,
+                max_retries=retry,
+            ),
+        )
+        self._bulkhead = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+
+        # Stale-while-revalidate nas leituras de plano
+        self.swr_enabled = True
+        self._refresh_lock = threading.Lock()
+        self._refreshing_plans = set()
+
+        # Consultas em lote (I/O-bound): threads compartilham o pool da sessão
+        self._executor = ThreadPoolExecutor(max_workers=16)
+
+        # Um circuito por recurso: falhas em um endpoint não bloqueiam os outros
+        self._breakers = {
+            name: _CircuitBreaker(name)
+            for name in ("preapproval_plan", "preapproval", "payment")
         }
 
+    def _send(self, resource: str, method: str, url: str, payload=None, **kwargs):
+        """
+        Executa a requisição pela sessão, passando pelo circuit breaker do recurso.
+        O ``payload`` é serializado com orjson (o Content-Type já está na sessão).
+        """
+        if payload is not None:
+            kwargs["data"] = orjson.dumps(payload)
+        breaker = self._breakers[resource]
+
+        # Bulkhead: se o Mercado Pago estiver lento, no máximo MAX_CONCURRENT_REQUESTS
+        # threads ficam presas nele; as demais falham rápido em vez de esperar.
+        # Adquirido antes do breaker para não liberar a chamada de teste sem executá-la
+        if not self._bulkhead.acquire(timeout=BULKHEAD_WAIT):
+            raise MercadoPagoUnavailable(
+                "Mercado Pago sobrecarregado (muitas chamadas simultâneas). Tente novamente."
+            )
+        try:
+            breaker.before_call()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except BaseException:
+                # Qualquer erro conta como falha (e encerra uma eventual chamada de teste)
+                breaker.record_failure()
+                raise
+        finally:
+            self._bulkhead.release()
+
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+
+    def _request(
+        self,
+        resource: str,
+        method: str,
+        path: str,
+        *,
+        payload: Dict[str, Any] = None,
+        ok=(200,),
+        error_message: str = "Erro do Mercado Pago (status {status}): {error}",
+        idempotent: bool = False,
+        etag: str = None,
+        with_etag: bool = False,
+    ):
+        """
+        Chamada REST ao Mercado Pago com o tratamento de erro padrão.
+
+        Args:
+            resource: Recurso do circuit breaker ("preapproval_plan", "preapproval", "payment")
+            method: Verbo HTTP
+            path: Caminho relativo a base_url
+            payload: Corpo JSON (opcional)
+            ok: Status HTTP considerados sucesso
+            error_message: Mensagem de erro, formatada com ``status`` e ``error``
+            idempotent: Se True, envia X-Idempotency-Key (POSTs que criam recursos)
+            etag: ETag da versão em cache; enviado como If-None-Match
+            with_etag: Se True, devolve também o ETag da resposta
+
+        Returns:
+            Dict com a resposta do Mercado Pago (None se ``etag`` foi informado
+            e o recurso não mudou: 304). Com ``with_etag``, a tupla (dados, ETag).
+
+        Raises:
+            MercadoPagoError: Se o status não estiver em ``ok``
+            _UpstreamUnavailable: Em falha de rede, timeout ou circuito aberto
+        """
+        headers = _idempotency_headers() if idempotent else {}
+        if etag:
+            headers["If-None-Match"] = etag
+
+        try:
+            response = self._send(
+                resource,
+                method,
+                f"{self.base_url}{path}",
+                payload=payload,
+                headers=headers,
+                timeout=self.timeout,
+            )
+        except requests.exceptions.ConnectTimeout:
+            raise _UpstreamUnavailable("Timeout ao conectar com Mercado Pago. Tente novamente.")
+        except requests.exceptions.ReadTimeout:
+            # Em POSTs a requisição pode ter chegado: o retry usa a mesma X-Idempotency-Key
+            raise _UpstreamUnavailable("Mercado Pago não respondeu a tempo. Tente novamente.")
+        except requests.exceptions.RequestException as e:
+            raise _UpstreamUnavailable(f"Erro de conexão com Mercado Pago: {str(e)}")
+
+        logger.debug("Mercado Pago %s %s: %s", method, path, response.status_code)
+
+        if etag and response.status_code == 304:
+            return (None, etag) if with_etag else None
+
+        if response.status_code not in ok:
+            error_data = _error_body(response)
+            raise MercadoPagoError(
+                error_message.format(status=response.status_code, error=error_data),
+                response.status_code,
+                error_data,
+            )
+
+        data = orjson.loads(response.content)
+        if with_etag:
+            return data, response.headers.get("ETag")
+        return data
+
     def create_preapproval_plan(
         self,
         reason: str,
@@ -65,94 +454,87 @@ class MercadoPagoService:
 
         Returns:
             Dict com resposta do Mercado Pago
+
+        Raises:
+            ValueError: Se frequency_type ou billing_day forem inválidos
         """
+        # Validação local: o Mercado Pago rejeitaria com 400 depois de um round-trip
+        if frequency_type not in _FREQUENCY_TYPES:
+            raise ValueError(
+                f"frequency_type inválido: {frequency_type!r} (use \"months\" ou \"days\")"
+            )
+        if billing_day is not None:
+            if not 1 <= int(billing_day) <= 28:
+                raise ValueError(f"billing_day deve estar entre 1 e 28 (recebido: {billing_day})")
+            if int(frequency) != 1:
+                raise ValueError("billing_day só pode ser usado com frequency = 1")
+
         # Estrutura conforme documentação oficial
-        plan_data = {
-            "reason": reason,
-            "auto_recurring": {
-                "frequency": int(frequency),
-                "frequency_type": frequency_type,
-                "transaction_amount": float(transaction_amount),
-                "currency_id": "BRL",
-            },
-            "back_url": back_url,
+        auto_recurring = {
+            "frequency": int(frequency),
+            "frequency_type": frequency_type,
+            # Fixa 2 casas antes de virar número JSON (evita ruído de float)
+            "transaction_amount": float(
+                Decimal(str(transaction_amount)).quantize(_CENTS, rounding=ROUND_HALF_UP)
+            ),
+            "currency_id": "BRL",
         }
 
         # Adicionar billing_day apenas se especificado
         # IMPORTANTE: quando billing_day está presente, frequency DEVE ser 1
         if billing_day is not None:
-            plan_data["auto_recurring"]["billing_day"] = int(billing_day)
-            plan_data["auto_recurring"]["billing_day_proportional"] = False
+            auto_recurring["billing_day"] = int(billing_day)
+            auto_recurring["billing_day_proportional"] = False
 
         # Adicionar repetições se especificado (opcional)
         if repetitions:
-            plan_data["auto_recurring"]["repetitions"] = int(repetitions)
+            auto_recurring["repetitions"] = int(repetitions)
 
         # Adicionar trial gratuito se especificado (opcional)
         if free_trial_frequency and free_trial_frequency_type:
-            plan_data["auto_recurring"]["free_trial"] = {
+            auto_recurring["free_trial"] = {
                 "frequency": int(free_trial_frequency),
                 "frequency_type": free_trial_frequency_type,
             }
 
-        # Métodos de pagamento permitidos (opcional, mas recomendado)
-        payment_types = [
-            {"id": "credit_card"},
-            {"id": "debit_card"},
-        ]
-        
-        # Adicionar PIX se habilitado
-        if enable_pix:
-            payment_types.append({"id": "bank_transfer"})  # PIX é um tipo de bank_transfer
-        
-        plan_data["payment_methods_allowed"] = {
-            "payment_types": payment_types,
-            "payment_methods": [],
+        plan_data = {
+            "reason": reason,
+            "auto_recurring": auto_recurring,
+            "back_url": back_url,
+            # Métodos de pagamento permitidos (opcional, mas recomendado)
+            "payment_methods_allowed": (
+                _PAYMENT_METHODS_WITH_PIX if enable_pix else _PAYMENT_METHODS_NO_PIX
+            ),
         }
 
         # Criar plano via API REST direta
-        import logging
-
-        logger = logging.getLogger(__name__)
+        logger.info("Criando plano no Mercado Pago: %s", plan_data.get("reason"))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Dados do plano: %s", _redact(plan_data))
 
         try:
-            # Log dos dados enviados para debug
-            logger.info(f'Criando plano no Mercado Pago: {plan_data.get("reason")}')
-            logger.debug(f"Dados do plano: {plan_data}")
-
-            response = requests.post(
-                f"{self.base_url}/preapproval_plan",
-                json=plan_data,
-                headers=self.headers,
-                timeout=30,
+            result = self._request(
+                "preapproval_plan",
+                "POST",
+                "/preapproval_plan",
+                payload=plan_data,
+                ok=(200, 201),
+                idempotent=True,
             )
-
-            # Log da resposta
-            logger.info(f"Status da resposta: {response.status_code}")
-
-            if response.status_code not in [200, 201]:
-                error_data = response.json() if response.text else {}
-                logger.error(f"Erro do Mercado Pago: {error_data}")
-
-                # Extrair mensagem de erro mais clara
-                error_message = error_data.get("message", str(error_data))
-                if "cause" in error_data:
-                    causes = error_data.get("cause", [])
-                    if causes and isinstance(causes, list):
-                        error_message = causes[0].get("description", error_message)
-
-                raise Exception(
-                    f"Erro ao criar plano no Mercado Pago (status {response.status_code}): {error_message}"
-                )
-
-            result = response.json()
-            logger.info(f'Plano criado com sucesso: {result.get("id")}')
-            return result
-
-        except requests.exceptions.Timeout:
-            raise Exception("Timeout ao conectar com Mercado Pago. Tente novamente.")
-        except requests.exceptions.RequestException as e:
-            raise Exception(f"Erro de conexão com Mercado Pago: {str(e)}")
+        except MercadoPagoError as e:
+            logger.error("Erro do Mercado Pago (status %s): %s", e.status_code, _redact(e.data))
+            raise MercadoPagoError(
+                f"Erro ao criar plano no Mercado Pago (status {e.status_code}): "
+                f"{_clear_error_message(e.data)}",
+                e.status_code,
+                e.data,
+            ) from None
+
+        logger.info("Plano criado com sucesso: %s", result.get("id"))
+        # Write-through: a primeira consulta do plano (checkout) já sai do cache
+        if result.get("id"):
+            _cache_plan(result["id"], result)
+        return result
 
     def get_preapproval_plan(self, plan_id: str) -> Dict[str, Any]:
         """
@@ -165,25 +547,107 @@ class MercadoPagoService:
             Dict com dados do plano
             
         Raises:
-            Exception: Se o plano não existir (404) ou houver outro erro
+            MercadoPagoError: Se o plano não existir (404) ou houver outro erro
         """
+        cache_key = _plan_cache_key(plan_id)
+        missing_key = _plan_missing_cache_key(plan_id)
         try:
-            response = requests.get(
-                f"{self.base_url}/preapproval_plan/{plan_id}", headers=self.headers
-            )
-
-            if response.status_code == 404:
-                error_data = response.json() if response.text else {}
-                raise Exception(f"Plano não encontrado: {error_data}")
-            
-            if response.status_code != 200:
-                error_data = response.json() if response.text else {}
-                raise Exception(f"Erro ao buscar plano (status {response.status_code}): {error_data}")
-
-            return response.json()
+            cached = cache.get_many([cache_key, missing_key])
+        except Exception:
+            cached = {}
+        entry = cached.get(cache_key)
+
+        # 404 recente: não consulta o Mercado Pago de novo (tentativas repetidas de webhook/checkout)
+        if entry is None and missing_key in cached:
+            # Mesmo erro da primeira resposta 404, independente do estado do cache
+            raise _missing_plan_error(cached[missing_key])
+
+        if entry is not None:
+            if time.time() < entry["fresh_until"]:
+                return entry["data"]
+            if self.swr_enabled:
+                self._refresh_plan_in_background(plan_id, entry)
+                return entry["data"]
+
+        # Single-flight: só um worker busca o plano; os outros esperam o cache
+        locked = _acquire_plan_lock(plan_id)
+        if not locked and entry is None:
+            waited = _wait_for_cached_plan(plan_id)
+            if waited is not None:
+                return waited
 
-        except requests.exceptions.RequestException as e:
-            raise Exception(f"Erro de conexão com Mercado Pago: {str(e)}")
+        try:
+            return self._fetch_preapproval_plan(plan_id, entry)
+        except _UpstreamUnavailable:
+            # Mercado Pago fora do ar: usa a última versão conhecida do plano
+            if entry is not None:
+                return entry["data"]
+            raise
+        finally:
+            if locked:
+                _release_plan_lock(plan_id)
+
+    def _fetch_preapproval_plan(self, plan_id: str, entry: Dict[str, Any] = None) -> Dict[str, Any]:
+        # Revalidação condicional: se o plano não mudou, o Mercado Pago responde 304 sem corpo
+        etag = entry.get("etag") if entry else None
+        try:
+            result, response_etag = self._request(
+                "preapproval_plan",
+                "GET",
+                f"/preapproval_plan/{plan_id}",
+                error_message="Erro ao buscar plano (status {status}): {error}",
+                etag=etag,
+                with_etag=True,
+            )
+        except MercadoPagoError as e:
+            if e.status_code == 404:
+                message = f"Plano não encontrado: {e.data}"
+                try:
+                    cache.delete(_plan_cache_key(plan_id))
+                    cache.set(
+                        _plan_missing_cache_key(plan_id),
+                        {"message": message, "data": e.data},
+                        PLAN_MISSING_CACHE_TIMEOUT,
+                    )
+                except Exception:
+                    pass
+                raise MercadoPagoError(message, e.status_code, e.data) from None
+            if e.status_code >= 500:
+                raise _UpstreamUnavailable(str(e)) from None
+            raise
+
+        if result is None:
+            # 304: a versão em cache continua válida
+            _cache_plan(plan_id, entry["data"], etag)
+            return entry["data"]
+
+        _cache_plan(plan_id, result, response_etag)
+        return result
+
+    def _refresh_plan_in_background(self, plan_id: str, entry: Dict[str, Any]):
+        with self._refresh_lock:
+            if plan_id in self._refreshing_plans:
+                return
+            self._refreshing_plans.add(plan_id)
+
+        # Outro processo já está atualizando este plano
+        if not _acquire_plan_lock(plan_id):
+            with self._refresh_lock:
+                self._refreshing_plans.discard(plan_id)
+            return
+
+        def refresh():
+            try:
+                self._fetch_preapproval_plan(plan_id, entry)
+            except Exception:
+                # Mantém a entrada velha; a próxima leitura tenta de novo
+                pass
+            finally:
+                _release_plan_lock(plan_id)
+                with self._refresh_lock:
+                    self._refreshing_plans.discard(plan_id)
+
+        threading.Thread(target=refresh, daemon=True).start()
 
     def create_preapproval(
         self,
@@ -233,21 +697,15 @@ class MercadoPagoService:
         # O Mercado Pago processa o pagamento imediatamente quando card_token_id é fornecido
         # Se precisar de start_date customizado, deve ser configurado no plano, não na assinatura
 
-        try:
-            response = requests.post(
-                f"{self.base_url}/preapproval",
-                json=subscription_data,
-                headers=self.headers,
-            )
-
-            if response.status_code not in [200, 201]:
-                error_data = response.json() if response.text else {}
-                raise Exception(f"Erro ao criar assinatura: {error_data}")
-
-            return response.json()
-
-        except requests.exceptions.RequestException as e:
-            raise Exception(f"Erro de conexão com Mercado Pago: {str(e)}")
+        return self._request(
+            "preapproval",
+            "POST",
+            "/preapproval",
+            payload=subscription_data,
+            ok=(200, 201),
+            error_message="Erro ao criar assinatura: {error}",
+            idempotent=True,
+        )
 
     def get_preapproval(self, preapproval_id: str) -> Dict[str, Any]:
         """
@@ -259,19 +717,24 @@ class MercadoPagoService:
         Returns:
             Dict com dados da assinatura
         """
-        try:
-            response = requests.get(
-                f"{self.base_url}/preapproval/{preapproval_id}", headers=self.headers
-            )
-
-            if response.status_code != 200:
-                error_data = response.json() if response.text else {}
-                raise Exception(f"Erro ao buscar assinatura: {error_data}")
+        return self._request(
+            "preapproval",
+            "GET",
+            f"/preapproval/{preapproval_id}",
+            error_message="Erro ao buscar assinatura: {error}",
+        )
+
+    def get_preapprovals_bulk(self, preapproval_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Busca várias assinaturas em paralelo.
 
-            return response.json()
+        Args:
+            preapproval_ids: IDs das assinaturas no Mercado Pago
 
-        except requests.exceptions.RequestException as e:
-            raise Exception(f"Erro de conexão com Mercado Pago: {str(e)}")
+        Returns:
+            Lista com os dados das assinaturas, na mesma ordem dos IDs
+        """
+        return list(self._executor.map(self.get_preapproval, preapproval_ids))
 
     def update_preapproval(
         self,
@@ -298,21 +761,17 @@ class MercadoPagoService:
         if reason:
             update_data["reason"] = reason
 
-        try:
-            response = requests.put(
-                f"{self.base_url}/preapproval/{preapproval_id}",
-                json=update_data,
-                headers=self.headers,
-            )
-
-            if response.status_code != 200:
-                error_data = response.json() if response.text else {}
-                raise Exception(f"Erro ao atualizar assinatura: {error_data}")
+        # Nada a alterar: evita um PUT vazio e devolve o estado atual
+        if not update_data:
+            return self.get_preapproval(preapproval_id)
 
-            return response.json()
-
-        except requests.exceptions.RequestException as e:
-            raise Exception(f"Erro de conexão com Mercado Pago: {str(e)}")
+        return self._request(
+            "preapproval",
+            "PUT",
+            f"/preapproval/{preapproval_id}",
+            payload=update_data,
+            error_message="Erro ao atualizar assinatura: {error}",
+        )
 
     def get_payment(self, payment_id: str) -> Dict[str, Any]:
         """
@@ -324,22 +783,56 @@ class MercadoPagoService:
         Returns:
             Dict com dados do pagamento
         """
-        response = self.sdk.payment().get(payment_id)
+        return self._request(
+            "payment",
+            "GET",
+            f"/v1/payments/{payment_id}",
+            error_message="Erro ao buscar pagamento (status {status}): {error}",
+        )
+
+    def get_payments_bulk(self, payment_ids: List[str]) -> List[Any]:
+        """
+        Busca vários pagamentos em paralelo (ex.: conciliação).
+
+        Args:
+            payment_ids: IDs dos pagamentos no Mercado Pago
+
+        Returns:
+            Lista na mesma ordem dos IDs com os dados de cada pagamento, ou a
+            exceção daquele pagamento (um 404 não interrompe o lote)
+        """
+        futures = [self._executor.submit(self.get_payment, payment_id) for payment_id in payment_ids]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
 
-        if response["status"] != 200:
-            raise Exception(f"Erro ao buscar pagamento: {response}")
+    def close(self):
+        """Libera as threads e as conexões abertas."""
+        self._executor.shutdown(wait=False)
+        self.session.close()
 
-        return response["response"]
+_service_lock = threading.Lock()
 
-# Singleton instance
-_mercadopago_service = None
+
+@lru_cache(maxsize=1)
+def _build_mercadopago_service() -> MercadoPagoService:
+    return MercadoPagoService()
 
 
 def get_mercadopago_service() -> MercadoPagoService:
     """
     Retorna instância singleton do serviço Mercado Pago.
+
+    O lock garante uma única instância (e um único pool de conexões) por
+    processo mesmo com várias threads pedindo o serviço ao mesmo tempo.
     """
-    global _mercadopago_service
-    if _mercadopago_service is None:
-        _mercadopago_service = MercadoPagoService()
-    return _mercadopago_service
+    with _service_lock:
+        return _build_mercadopago_service()
+
+
+# Permite descartar a instância (ex.: após trocar o token em testes)
+get_mercadopago_service.cache_clear = _build_mercadopago_service.cache_clear
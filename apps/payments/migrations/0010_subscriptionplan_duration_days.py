@@ -0,0 +1,33 @@
+from django.db import migrations, models
+
+# Durações vigentes em SubscriptionPlanType.get_config() no momento desta migração
+DURATION_DAYS = {
+    'monthly': 30,
+    'quarterly': 90,
+    'semiannual': 180,
+    'annual': 365,
+}
+
+
+def backfill_duration_days(apps, schema_editor):
+    SubscriptionPlan = apps.get_model('payments', 'SubscriptionPlan')
+    for plan_type, duration_days in DURATION_DAYS.items():
+        SubscriptionPlan.objects.filter(subscription_plan_type=plan_type).update(
+            duration_days=duration_days
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0009_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subscriptionplan',
+            name='duration_days',
+            field=models.PositiveSmallIntegerField(default=30, help_text='Dias de acesso liberados a cada ciclo do plano', verbose_name='Duração (dias)'),
+        ),
+        migrations.RunPython(backfill_duration_days, reverse_code=migrations.RunPython.noop),
+    ]
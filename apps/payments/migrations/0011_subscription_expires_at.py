@@ -0,0 +1,45 @@
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Greatest
+
+
+def backfill_expires_at(apps, schema_editor):
+    Subscription = apps.get_model('payments', 'Subscription')
+    SubscriptionPlan = apps.get_model('payments', 'SubscriptionPlan')
+
+    with_start = Subscription.objects.filter(start_date__isnull=False)
+    with_start.filter(is_trial=True).update(expires_at=F('start_date') + timedelta(days=14))
+
+    durations = SubscriptionPlan.objects.values_list('duration_days', flat=True).distinct()
+    for duration_days in durations:
+        with_start.filter(is_trial=False, plan__duration_days=duration_days).update(
+            expires_at=F('start_date') + timedelta(days=duration_days)
+        )
+
+    # Assinaturas já renovadas: a data estendida só existe na empresa
+    Company = apps.get_model('companies', 'Company')
+    company_expires_at = Company.objects.filter(pk=OuterRef('company_id')).values(
+        'subscription_expires_at'
+    )[:1]
+    with_start.filter(is_trial=False, status='authorized').update(
+        expires_at=Greatest('expires_at', Subquery(company_expires_at))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0014_remove_company_mercadopago_subscription_id_and_more'),
+        ('payments', '0010_subscriptionplan_duration_days'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subscription',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, help_text='start_date + duração do plano (14 dias para trial), estendida a cada renovação', null=True, verbose_name='Data de Expiração'),
+        ),
+        migrations.RunPython(backfill_expires_at, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0011_subscription_expires_at'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='payment',
+            name='payment_payment_id_trgm',
+        ),
+        migrations.RemoveIndex(
+            model_name='payment',
+            name='payment_transaction_id_trgm',
+        ),
+        migrations.RemoveIndex(
+            model_name='payment',
+            name='payment_code_trgm',
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('payment_id'), name='gin_trgm_ops'), name='payment_payment_id_upper_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('transaction_id'), name='gin_trgm_ops'), name='payment_transaction_id_upper_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('code'), name='gin_trgm_ops'), name='payment_code_upper_trgm'),
+        ),
+    ]
@@ -1,8 +1,52 @@
+import logging
 import uuid
-from django.db import models
+from datetime import timedelta
+from decimal import Decimal
+from types import MappingProxyType
+
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db import models, transaction
 from django.db.models import Q
+from django.db.models.functions import Upper
 from django.utils import timezone
 
+from apps.companies.models import Company
+
+logger = logging.getLogger(__name__)
+
+# Configuração de Valores dos Planos (somente leitura, montada uma vez no import)
+_PLAN_CONFIGS = {
+    "monthly": MappingProxyType({
+        "reason": "Plano Mensal Fintelis",
+        "amount": Decimal("500.00"),
+        "frequency": 1,
+        "frequency_type": "months",
+        "duration_days": 30,
+    }),
+    "quarterly": MappingProxyType({
+        "reason": "Plano Trimestral Fintelis",
+        "amount": Decimal("1400.00"),  # ~R$467/mês - economia de ~7%
+        "frequency": 3,  # A cada 3 meses
+        "frequency_type": "months",
+        "duration_days": 90,
+    }),
+    "semiannual": MappingProxyType({
+        "reason": "Plano Semestral Fintelis",
+        "amount": Decimal("2700.00"),  # R$450/mês - economia de 10%
+        "frequency": 6,  # A cada 6 meses
+        "frequency_type": "months",
+        "duration_days": 180,
+    }),
+    "annual": MappingProxyType({
+        "reason": "Plano Anual Fintelis",
+        "amount": Decimal("3900.00"),  # R$325/mês - economia de 35%
+        "frequency": 12,  # A cada 12 meses
+        "frequency_type": "months",
+        "duration_days": 365,
+    }),
+}
+_EMPTY_CONFIG = MappingProxyType({})
+
 
 class SubscriptionPlanType(models.TextChoices):
     """
@@ -30,42 +74,9 @@ class SubscriptionPlanType(models.TextChoices):
             billing_day: int - Dia do mês para cobrança (1-28). Padrão: 10
 
         Returns:
-            dict com: reason, amount, frequency, frequency_type, billing_day, duration_days
+            mapping somente leitura com: reason, amount, frequency, frequency_type, duration_days
         """
-        from decimal import Decimal
-
-        # Configuração de Valores dos Planos
-        configs = {
-            cls.MONTHLY.value: {
-                "reason": "Plano Mensal Fintelis",
-                "amount": Decimal("500.00"),
-                "frequency": 1,
-                "frequency_type": "months",
-                "duration_days": 30,
-            },
-            cls.QUARTERLY.value: {
-                "reason": "Plano Trimestral Fintelis",
-                "amount": Decimal("1400.00"),  # ~R$467/mês - economia de ~7%
-                "frequency": 3,  # A cada 3 meses
-                "frequency_type": "months",
-                "duration_days": 90,
-            },
-            cls.SEMIANNUAL.value: {
-                "reason": "Plano Semestral Fintelis",
-                "amount": Decimal("2700.00"),  # R$450/mês - economia de 10%
-                "frequency": 6,  # A cada 6 meses
-                "frequency_type": "months",
-                "duration_days": 180,
-            },
-            cls.ANNUAL.value: {
-                "reason": "Plano Anual Fintelis",
-                "amount": Decimal("3900.00"),  # R$325/mês - economia de 35%
-                "frequency": 12,  # A cada 12 meses
-                "frequency_type": "months",
-                "duration_days": 365,
-            },
-        }
-        return configs.get(plan_type, {})
+        return _PLAN_CONFIGS.get(plan_type, _EMPTY_CONFIG)
 
     @classmethod
     def get_all_configs(cls):
@@ -130,6 +141,12 @@ class SubscriptionPlan(models.Model):
         verbose_name="Tipo de Frequência",
     )
 
+    duration_days = models.PositiveSmallIntegerField(
+        default=30,
+        verbose_name="Duração (dias)",
+        help_text="Dias de acesso liberados a cada ciclo do plano",
+    )
+
     repetitions = models.IntegerField(
         null=True,
         blank=True,
@@ -199,6 +216,12 @@ class SubscriptionPlan(models.Model):
         return f"{self.reason} - R$ {self.transaction_amount}"
 
 
+class SubscriptionQuerySet(models.QuerySet):
+    def with_relations(self):
+        """Carrega empresa e plano no mesmo SELECT (usados em activate/renew/cancel)."""
+        return self.select_related("company", "plan")
+
+
 class Subscription(models.Model):
     """
     Modelo para armazenar assinaturas criadas no Mercado Pago.
@@ -270,6 +293,15 @@ class Subscription(models.Model):
         null=True, blank=True, verbose_name="Data de Término"
     )
 
+    expires_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True,
+        verbose_name="Data de Expiração",
+        help_text="start_date + duração do plano (14 dias para trial), estendida a cada renovação",
+    )
+
     # Timestamps
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
@@ -279,6 +311,8 @@ class Subscription(models.Model):
         default=dict, blank=True, verbose_name="Resposta do Mercado Pago"
     )
 
+    objects = SubscriptionQuerySet.as_manager()
+
     class Meta:
         db_table = "subscription"
         ordering = ["-created_at"]
@@ -288,6 +322,8 @@ class Subscription(models.Model):
             models.Index(fields=["company", "status"]),
             models.Index(fields=["preapproval_id"]),
             models.Index(fields=["company", "is_trial"]),
+            # Busca exata/prefixo no admin
+            models.Index(fields=["external_reference"]),
         ]
         constraints = [
             # Garantir que cada empresa só pode ter um trial ativo
@@ -302,8 +338,17 @@ class Subscription(models.Model):
         trial_label = " [TRIAL]" if self.is_trial else ""
         return f"Subscription {self.preapproval_id} - {self.company.name}{trial_label}"
 
-    @property
-    def expires_at(self):
+    def save(self, *args, **kwargs):
+        # Derivar expires_at apenas quando ainda não foi definido; activate() e
+        # renew() gravam o valor explicitamente (renovações estendem a data)
+        if self.expires_at is None and self.start_date:
+            self.expires_at = self.calculate_expires_at()
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "expires_at"}
+        super().save(*args, **kwargs)
+
+    def calculate_expires_at(self):
         """
         Calcula data de expiração baseada em start_date + duração do plano.
         Para trial: 14 dias
@@ -312,17 +357,22 @@ class Subscription(models.Model):
         if not self.start_date:
             return None
         
-        from datetime import timedelta
-        from .models import SubscriptionPlanType
-        
         if self.is_trial:
             # Trial sempre tem 14 dias
             return self.start_date + timedelta(days=14)
         
         # Para planos pagos, usar duration_days do plano
-        plan_config = SubscriptionPlanType.get_config(self.plan.subscription_plan_type)
-        duration_days = plan_config.get("duration_days", 30)
-        return self.start_date + timedelta(days=duration_days)
+        return self.start_date + timedelta(days=self.plan.duration_days)
+
+    def refresh_expires_at(self):
+        """
+        Recalcula expires_at na ativação (sem salvar) sem encurtar uma data
+        já estendida por renew(). Retorna a data resultante.
+        """
+        calculated = self.calculate_expires_at()
+        if self.expires_at is None or (calculated and calculated > self.expires_at):
+            self.expires_at = calculated
+        return self.expires_at
 
     def activate(self, start_date=None):
         """
@@ -338,18 +388,39 @@ class Subscription(models.Model):
         if not self.start_date:
             self.start_date = start_date or timezone.now()
         
-        self.save()
+        self.refresh_expires_at()
+
+        with transaction.atomic():
+            self.save(update_fields=["status", "start_date", "expires_at", "updated_at"])
+
+            self.apply_activation_to_company()
+            self._update_company(
+                "subscription_active", "subscription_started_at", "subscription_expires_at"
+            )
 
-        # Calcular expiração
-        expires_at = self.expires_at
+    def _update_company(self, *fields):
+        """
+        Persiste os campos informados da empresa (e updated_at) em um único
+        UPDATE, sem passar por Company.save().
+        """
+        company = self.company
+        company.updated_at = timezone.now()
+        Company.objects.filter(pk=self.company_id).update(
+            **{field: getattr(company, field) for field in (*fields, "updated_at")}
+        )
 
-        # Atualizar empresa
-        self.company.subscription_active = True
+    def apply_activation_to_company(self):
+        """
+        Atualiza (sem salvar) os campos de assinatura da empresa para esta
+        assinatura ativa. Retorna a empresa.
+        """
+        company = self.company
+        company.subscription_active = True
         # Só atualizar subscription_started_at se não estava definido (primeira ativação)
-        if not self.company.subscription_started_at:
-            self.company.subscription_started_at = self.start_date
-        self.company.subscription_expires_at = expires_at
-        self.company.save()
+        if not company.subscription_started_at:
+            company.subscription_started_at = self.start_date
+        company.subscription_expires_at = self.expires_at
+        return company
     
     def renew(self):
         """
@@ -359,8 +430,6 @@ class Subscription(models.Model):
         Returns:
             datetime: Nova data de expiração calculada
         """
-        from datetime import timedelta
-        
         self.status = self.Status.AUTHORIZED
         
         # Se não tem start_date, definir agora (primeira vez)
@@ -383,23 +452,21 @@ class Subscription(models.Model):
         if self.is_trial:
             duration_days = 14
         else:
-            # SubscriptionPlanType já está importado no topo do arquivo
-            plan_config = SubscriptionPlanType.get_config(self.plan.subscription_plan_type)
-            duration_days = plan_config.get("duration_days", 30)
+            duration_days = self.plan.duration_days
         
         # Calcular nova expiração
         new_expires_at = base_date + timedelta(days=duration_days)
+        self.expires_at = new_expires_at
         
-        self.save()
-        
-        # Atualizar empresa
-        self.company.subscription_active = True
-        self.company.subscription_expires_at = new_expires_at
-        # Não alterar subscription_started_at em renovações (mantém a data original)
-        self.company.save()
+        with transaction.atomic():
+            self.save(update_fields=["status", "start_date", "expires_at", "updated_at"])
+            
+            # Atualizar empresa
+            self.company.subscription_active = True
+            self.company.subscription_expires_at = new_expires_at
+            # Não alterar subscription_started_at em renovações (mantém a data original)
+            self._update_company("subscription_active", "subscription_expires_at")
         
-        import logging
-        logger = logging.getLogger(__name__)
         logger.info(f"Assinatura {self.preapproval_id} renovada: {base_date} + {duration_days} dias = {new_expires_at}")
         
         return new_expires_at
@@ -413,49 +480,52 @@ class Subscription(models.Model):
         self.status = self.Status.CANCELLED
         # end_date será definido quando a assinatura realmente expirar
         # Por enquanto, mantemos None para indicar que ainda está ativa até expires_at
-        self.save()
+        with transaction.atomic():
+            self.save(update_fields=["status", "updated_at"])
 
-        # Verificar se há outra assinatura ativa (excluindo esta)
-        has_other_active = self.company.subscriptions.exclude(
+            if self.apply_cancellation_to_company():
+                self._update_company(
+                    "subscription_active", "subscription_started_at", "subscription_expires_at"
+                )
+
+    def apply_cancellation_to_company(self):
+        """
+        Atualiza (sem salvar) os campos de assinatura da empresa após o
+        cancelamento desta assinatura. Retorna a empresa.
+        """
+        company = self.company
+
+        # Buscar a outra assinatura ativa mais recente (excluindo esta) em uma única consulta
+        other_subscription = company.subscriptions.exclude(
             id=self.id
         ).filter(
             status__in=[self.Status.AUTHORIZED, self.Status.PENDING]
-        ).exists()
+        ).order_by('-start_date', '-created_at').first()
         
         # Se não há outra assinatura ativa, verificar se ainda está dentro do período de expiração
-        if not has_other_active:
+        if other_subscription is None:
             # Se a empresa ainda tem data de expiração futura, manter ativa até lá
-            if self.company.subscription_expires_at and timezone.now() < self.company.subscription_expires_at:
+            if company.subscription_expires_at and timezone.now() < company.subscription_expires_at:
                 # Manter a empresa ativa até a data de expiração
                 # Garantir que subscription_active seja True e manter subscription_started_at e subscription_expires_at
-                self.company.subscription_active = True
+                company.subscription_active = True
                 # Não limpar subscription_started_at nem subscription_expires_at
                 # A empresa continuará com acesso até subscription_expires_at
-                self.company.save()
-                import logging
-                logger = logging.getLogger(__name__)
                 logger.info(
-                    f"Assinatura {self.preapproval_id} cancelada, mas empresa {self.company.name} "
-                    f"mantém acesso ativo até {self.company.subscription_expires_at}"
+                    f"Assinatura {self.preapproval_id} cancelada, mas empresa {company.name} "
+                    f"mantém acesso ativo até {company.subscription_expires_at}"
                 )
             else:
                 # Se já expirou ou não tem data de expiração, desativar imediatamente
-                self.company.subscription_active = False
-                self.company.subscription_started_at = None
-                self.company.subscription_expires_at = None
-                self.company.save()
-        else:
-            # Se há outra assinatura ativa, atualizar dados da empresa com a mais recente
-            other_subscription = self.company.subscriptions.exclude(
-                id=self.id
-            ).filter(
-                status__in=[self.Status.AUTHORIZED, self.Status.PENDING]
-            ).order_by('-start_date', '-created_at').first()
-            
-            if other_subscription:
-                self.company.subscription_started_at = other_subscription.start_date
-                self.company.subscription_expires_at = other_subscription.expires_at
-                self.company.save()
+                company.subscription_active = False
+                company.subscription_started_at = None
+                company.subscription_expires_at = None
+            return company
+
+        # Se há outra assinatura ativa, atualizar dados da empresa com a mais recente
+        company.subscription_started_at = other_subscription.start_date
+        company.subscription_expires_at = other_subscription.expires_at
+        return company
     
     @classmethod
     def create_trial(cls, company):
@@ -472,40 +542,41 @@ class Subscription(models.Model):
         Raises:
             ValueError: Se a empresa já possui um trial
         """
-        # Verificar se a empresa já tem um trial
-        existing_trial = cls.objects.filter(
-            company=company,
-            is_trial=True
-        ).exists()
+        with transaction.atomic():
+            # Verificar se a empresa já tem um trial
+            existing_trial = cls.objects.filter(
+                company=company,
+                is_trial=True
+            ).exists()
         
-        if existing_trial:
-            raise ValueError(f"Empresa {company.name} já possui um trial. Cada empresa só pode ter um trial.")
+            if existing_trial:
+                raise ValueError(f"Empresa {company.name} já possui um trial. Cada empresa só pode ter um trial.")
         
-        # Criar plano de trial (não precisa estar no Mercado Pago)
-        # Usar um plano mensal como base, mas será marcado como trial
-        monthly_plan = SubscriptionPlan.objects.filter(
-            subscription_plan_type=SubscriptionPlanType.MONTHLY.value,
-            status='active'
-        ).first()
+            # Criar plano de trial (não precisa estar no Mercado Pago)
+            # Usar um plano mensal como base, mas será marcado como trial
+            monthly_plan = SubscriptionPlan.objects.filter(
+                subscription_plan_type=SubscriptionPlanType.MONTHLY.value,
+                status='active'
+            ).first()
         
-        if not monthly_plan:
-            raise ValueError("Plano mensal não encontrado. Execute create_subscription_plans primeiro.")
+            if not monthly_plan:
+                raise ValueError("Plano mensal não encontrado. Execute create_subscription_plans primeiro.")
         
-        # Criar subscription de trial
-        import time
-        trial_id = f"trial_{company.id}_{int(time.time())}"
-        subscription = cls.objects.create(
-            company=company,
-            plan=monthly_plan,
-            preapproval_id=trial_id,
-            payer_email=company.email,
-            status=cls.Status.AUTHORIZED,
-            is_trial=True,
-            start_date=timezone.now(),
-        )
+            # Criar subscription de trial
+            import time
+            trial_id = f"trial_{company.id}_{int(time.time())}"
+            subscription = cls.objects.create(
+                company=company,
+                plan=monthly_plan,
+                preapproval_id=trial_id,
+                payer_email=company.email,
+                status=cls.Status.AUTHORIZED,
+                is_trial=True,
+                start_date=timezone.now(),
+            )
         
-        # Ativar na empresa
-        subscription.activate()
+            # Ativar na empresa
+            subscription.activate()
         
         return subscription
 
@@ -629,6 +700,21 @@ class Payment(models.Model):
             models.Index(fields=["company", "status"]),
             models.Index(fields=["payment_id"]),
             models.Index(fields=["created_at"]),
+            # Trigram (pg_trgm) para as buscas icontains do admin. No PostgreSQL o
+            # icontains vira UPPER("col"::text) LIKE UPPER(...), então o índice
+            # precisa ser sobre a expressão UPPER(col) para ser usado
+            GinIndex(
+                OpClass(Upper("payment_id"), name="gin_trgm_ops"),
+                name="payment_payment_id_upper_trgm",
+            ),
+            GinIndex(
+                OpClass(Upper("transaction_id"), name="gin_trgm_ops"),
+                name="payment_transaction_id_upper_trgm",
+            ),
+            GinIndex(
+                OpClass(Upper("code"), name="gin_trgm_ops"),
+                name="payment_code_upper_trgm",
+            ),
         ]
 
     def __str__(self):
@@ -643,7 +729,7 @@ class Payment(models.Model):
         self.completed_at = timezone.now()
         if transaction_id:
             self.transaction_id = transaction_id
-        self.save()
+        self.save(update_fields=["status", "completed_at", "transaction_id", "updated_at"])
 
     def mark_as_failed(self, reason=None):
         """
@@ -652,4 +738,4 @@ class Payment(models.Model):
         self.status = self.Status.FAILED
         if reason:
             self.notes = reason
-        self.save()
+        self.save(update_fields=["status", "notes", "updated_at"])
@@ -115,16 +115,15 @@ def example_calculate_discount():
 Para alterar preços ou configurações:
 
 1. Edite apenas: apps/payments/models.py
-2. Dentro da classe SubscriptionPlanType
-3. No método get_config()
-4. Altere o dicionário configs
+2. No topo do módulo
+3. Altere o dicionário _PLAN_CONFIGS
 
 Exemplo:
-    configs = {
-        cls.MONTHLY.value: {
+    _PLAN_CONFIGS = {
+        "monthly": MappingProxyType({
             'amount': Decimal('600.00'),  # ← Altere aqui
             ...
-        },
+        }),
     }
 
 Todos os lugares que usam o valor serão atualizados automaticamente:
@@ -135,6 +135,7 @@ class SubscriptionPlanViewSet(viewsets.ReadOnlyModelViewSet):
                 currency_id="BRL",
                 frequency=config["frequency"],
                 frequency_type=config["frequency_type"],
+                duration_days=config["duration_days"],
                 billing_day=config["billing_day"],
                 free_trial_frequency=15,
                 free_trial_frequency_type="days",
@@ -164,7 +165,7 @@ class SubscriptionViewSet(viewsets.ReadOnlyModelViewSet):
         """Filtra assinaturas do usuário autenticado."""
         user = self.request.user
         company_ids = user.memberships.values_list("company_id", flat=True)
-        return Subscription.objects.filter(company_id__in=company_ids)
+        return Subscription.objects.with_relations().filter(company_id__in=company_ids)
 
     @action(detail=False, methods=["post"], url_path="create")
     def create_subscription(self, request):
@@ -145,7 +145,7 @@ def handle_preapproval_notification(preapproval_id: str):
 
         # Buscar ou criar assinatura no banco
         try:
-            subscription = Subscription.objects.get(preapproval_id=preapproval_id)
+            subscription = Subscription.objects.with_relations().get(preapproval_id=preapproval_id)
             old_status = subscription.status
         except Subscription.DoesNotExist:
             # Tentar buscar subscription pendente de várias formas
@@ -383,7 +383,7 @@ def handle_subscription_authorized_payment(notification_id: str):
         try:
             mp_payment = mp_service.get_payment(notification_id)
             logger.info(f"ID {notification_id} é um payment. Processando como pagamento normal.")
-            handle_payment_notification(notification_id)
+            handle_payment_notification(notification_id, mp_payment=mp_payment)
             return
         except Exception as e:
             if (
@@ -405,7 +405,7 @@ def handle_subscription_authorized_payment(notification_id: str):
             
             # Buscar subscription no banco
             try:
-                subscription = Subscription.objects.get(preapproval_id=preapproval_id)
+                subscription = Subscription.objects.with_relations().get(preapproval_id=preapproval_id)
                 logger.info(f"Subscription encontrada: {subscription.id} para empresa {subscription.company.name}")
                 
                 # Se a subscription está autorizada, buscar pagamentos recentes relacionados
@@ -508,10 +508,13 @@ def handle_subscription_authorized_payment(notification_id: str):
         return
 
 
-def handle_payment_notification(payment_id: str):
+def handle_payment_notification(payment_id: str, mp_payment: dict = None):
     """
     Processa notificação de pagamento (PIX, Cartão, etc).
     Atualiza status do pagamento e ativa assinatura quando aprovado.
+
+    mp_payment: dados do pagamento já buscados no Mercado Pago nesta mesma
+    notificação (evita buscar o mesmo pagamento duas vezes).
     """
     import logging
 
@@ -521,7 +524,8 @@ def handle_payment_notification(payment_id: str):
         # Buscar pagamento no Mercado Pago
         mp_service = get_mercadopago_service()
         try:
-            mp_payment = mp_service.get_payment(payment_id)
+            if mp_payment is None:
+                mp_payment = mp_service.get_payment(payment_id)
         except Exception as e:
             if (
                 "404" in str(e)
@@ -572,7 +576,7 @@ def handle_payment_notification(payment_id: str):
             # Tentar buscar subscription relacionada se ainda não foi encontrada
             if preapproval_id:
                 try:
-                    subscription = Subscription.objects.get(preapproval_id=preapproval_id)
+                    subscription = Subscription.objects.with_relations().get(preapproval_id=preapproval_id)
                     logger.info(f"Subscription encontrada para payment existente: {subscription.preapproval_id}")
                 except Subscription.DoesNotExist:
                     pass
@@ -590,7 +594,7 @@ def handle_payment_notification(payment_id: str):
             # Estratégia 0: Buscar subscription diretamente pelo preapproval_id (se encontrado)
             if preapproval_id:
                 try:
-                    subscription = Subscription.objects.get(preapproval_id=preapproval_id)
+                    subscription = Subscription.objects.with_relations().get(preapproval_id=preapproval_id)
                     company = subscription.company
                     logger.info(f"Subscription encontrada via preapproval_id: {preapproval_id}, empresa: {company.name}")
                     print(f"✅ Subscription encontrada: {preapproval_id}, empresa: {company.name}")
@@ -829,7 +833,7 @@ def handle_payment_notification(payment_id: str):
                         related_subscription = subscription
                     elif preapproval_id:
                         try:
-                            related_subscription = Subscription.objects.get(preapproval_id=preapproval_id)
+                            related_subscription = Subscription.objects.with_relations().get(preapproval_id=preapproval_id)
                         except Subscription.DoesNotExist:
                             pass
                     
@@ -860,7 +864,7 @@ def handle_payment_notification(payment_id: str):
                 # Se não encontrou subscription ainda, tentar buscar pelo preapproval_id
                 if not subscription and preapproval_id:
                     try:
-                        subscription = Subscription.objects.get(
+                        subscription = Subscription.objects.with_relations().get(
                             preapproval_id=preapproval_id
                         )
                         company = subscription.company
@@ -959,7 +963,7 @@ def handle_payment_notification(payment_id: str):
                 
                 if preapproval_id_for_search:
                     try:
-                        subscription = Subscription.objects.get(preapproval_id=preapproval_id_for_search)
+                        subscription = Subscription.objects.with_relations().get(preapproval_id=preapproval_id_for_search)
                         logger.info(f"Subscription encontrada via preapproval_id (aprovado): {preapproval_id_for_search}")
                     except Subscription.DoesNotExist:
                         logger.warning(f"Subscription {preapproval_id_for_search} não encontrada após aprovação")
@@ -1038,7 +1042,7 @@ def handle_payment_notification(payment_id: str):
             # Estratégia 2: Buscar por preapproval_id
             if not subscription and preapproval_id:
                 try:
-                    subscription = Subscription.objects.get(
+                    subscription = Subscription.objects.with_relations().get(
                         preapproval_id=preapproval_id
                     )
                     logger.info(
@@ -1155,7 +1159,7 @@ def handle_payment_notification(payment_id: str):
                 # Tentar buscar pelo preapproval_id novamente
                 if preapproval_id:
                     try:
-                        subscription = Subscription.objects.get(preapproval_id=preapproval_id)
+                        subscription = Subscription.objects.with_relations().get(preapproval_id=preapproval_id)
                         logger.info(f"Subscription encontrada para pagamento recusado: {subscription.preapproval_id}")
                     except Subscription.DoesNotExist:
                         pass
@@ -0,0 +1,59 @@
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Paginator para changelists de tabelas grandes.
+
+    Sem filtros, usa a estimativa do PostgreSQL (pg_class.reltuples) em cache
+    por ``cache_timeout`` segundos em vez de um COUNT(*) na tabela inteira.
+    Tabelas pequenas, listagens filtradas e outros bancos usam o COUNT real.
+    """
+
+    cache_timeout = 60
+    min_estimate = 10000
+
+    @cached_property
+    def count(self):
+        estimate = self._estimated_count()
+        if estimate is None or estimate < self.min_estimate:
+            return super().count
+        return estimate
+
+    def _estimated_count(self):
+        query = getattr(self.object_list, "query", None)
+        if query is None or query.where or query.distinct:
+            return None
+
+        model = self.object_list.model
+        connection = connections[self.object_list.db]
+        if connection.vendor != "postgresql":
+            return None
+
+        table = model._meta.db_table
+        cache_key = f"paginator_estimated_count:{table}"
+        try:
+            estimate = cache.get(cache_key)
+        except Exception:
+            estimate = None
+        if estimate is not None:
+            return estimate
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [table]
+            )
+            row = cursor.fetchone()
+        # reltuples é -1 em tabelas que ainda não passaram por ANALYZE
+        if not row or row[0] < 0:
+            return None
+
+        estimate = row[0]
+        try:
+            cache.set(cache_key, estimate, self.cache_timeout)
+        except Exception:
+            pass
+        return estimate
@@ -0,0 +1,24 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer baseado em orjson para respostas com listas grandes.
+    Tipos que o orjson não serializa nativamente (Decimal, lazy strings, etc.)
+    seguem as mesmas regras do encoder padrão do DRF.
+    """
+
+    _fallback_encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        renderer_context = renderer_context or {}
+        option = orjson.OPT_NON_STR_KEYS
+        if self.get_indent(accepted_media_type, renderer_context):
+            option |= orjson.OPT_INDENT_2
+
+        return orjson.dumps(data, default=self._fallback_encoder.default, option=option)